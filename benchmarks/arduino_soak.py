@@ -0,0 +1,201 @@
+# benchmarks/arduino_soak.py
+"""Soak the gate and payment serial loops against simulated Arduinos.
+
+Runs GateController and PaymentSystem against the pty simulators in
+modules/arduino_simulator.py, so no hardware is needed. Reports latency,
+throughput and any protocol or database inconsistency, and exits non-zero
+on failures so it can run on CI.
+
+Usage:
+    python3 benchmarks/arduino_soak.py gate --cycles 50 --glitch-rate 0.05
+    python3 benchmarks/arduino_soak.py late-start --cycles 10
+    python3 benchmarks/arduino_soak.py payment --cards 200 --seed 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.arduino_simulator import GateSimulator, PaymentTerminalSimulator, NO_ECHO_DISTANCE
+from modules.database_utils import DatabaseManager
+from modules.gate_control import GateController
+from modules.payment_processor import PaymentProcessor
+from payment_system import PaymentSystem
+
+FEE = 500  # One started hour
+
+
+def percentiles(samples):
+    if not samples:
+        return 'no samples'
+    values = np.array(samples) * 1000
+    return (f"p50={np.percentile(values, 50):.1f} p90={np.percentile(values, 90):.1f} "
+            f"p99={np.percentile(values, 99):.1f} max={values.max():.1f} ms")
+
+
+def wait_until(condition, timeout, poll=0.001):
+    """Seconds until `condition()` held, or None on timeout"""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if condition():
+            return time.monotonic() - start
+        time.sleep(poll)
+    return None
+
+
+def soak_gate(args):
+    simulator = GateSimulator(interval=args.interval, noise=args.noise, glitch_rate=args.glitch_rate,
+                              seed=args.seed).start()
+    gate = GateController(port=simulator.port)
+    gate.set_presence_range(0, 50)
+    arrive, leave, failures = [], [], []
+
+    try:
+        for cycle in range(args.cycles):
+            simulator.set_distance(30)
+            arrived = wait_until(gate.vehicle_present, 2.0)
+            if arrived is None:
+                failures.append(f"cycle {cycle}: arrival not detected")
+                continue
+            arrive.append(arrived)
+
+            gate.schedule_open(args.open_time)
+            if wait_until(lambda: simulator.gate_open, 1.0) is None:
+                failures.append(f"cycle {cycle}: gate never opened")
+            if wait_until(lambda: not simulator.gate_open, args.open_time + 1.0) is None:
+                failures.append(f"cycle {cycle}: gate never closed")
+
+            simulator.set_distance(NO_ECHO_DISTANCE)
+            left = wait_until(lambda: not gate.vehicle_present(), 2.0)
+            if left is None:
+                failures.append(f"cycle {cycle}: departure not detected")
+            else:
+                leave.append(left)
+
+            # An empty lane must stay empty despite glitches
+            flips = 0
+            for _ in range(50):
+                time.sleep(0.002)
+                flips += gate.vehicle_present()
+            if flips:
+                failures.append(f"cycle {cycle}: {flips} false presence readings")
+    finally:
+        gate.close()
+        simulator.stop()
+
+    commands = ''.join(command for _, command in simulator.received)
+    print(f"[SOAK] {args.cycles} gate cycles, commands sent: {commands.count('1')} open / {commands.count('0')} close")
+    print(f"[SOAK] Arrival detected in   {percentiles(arrive)}")
+    print(f"[SOAK] Departure detected in {percentiles(leave)}")
+    return failures
+
+
+def soak_late_start(args):
+    """Lane starts before the Arduino is plugged in; a gate open decided meanwhile must be replayed"""
+    workdir = tempfile.mkdtemp(prefix='pms-soak-')
+    connected, failures = [], []
+
+    for cycle in range(args.cycles):
+        port = os.path.join(workdir, f'ttyGATE{cycle}')  # Does not exist until the "board" is plugged in
+        gate = GateController(port=port, reset_delay=0.5, max_backoff=0.2)
+        simulator = None
+        try:
+            if gate.connected:
+                failures.append(f"cycle {cycle}: connected before the board existed")
+            open_time = args.open_time + 2 * gate.max_backoff + 1.0  # Still open when the board shows up
+            gate.schedule_open(open_time)
+            time.sleep(gate.max_backoff)
+
+            simulator = GateSimulator(interval=args.interval, seed=args.seed).start()
+            os.symlink(simulator.port, port)
+            opened = wait_until(lambda: simulator.gate_open, 5.0)
+            if opened is None:
+                failures.append(f"cycle {cycle}: queued open not replayed after connecting")
+                continue
+            connected.append(opened)
+            if wait_until(lambda: not simulator.gate_open, open_time + 1.0) is None:
+                failures.append(f"cycle {cycle}: gate never closed")
+        finally:
+            gate.close()
+            if simulator:
+                simulator.stop()
+            if os.path.lexists(port):
+                os.remove(port)
+
+    print(f"[SOAK] {args.cycles} late starts, {len(connected)} queued opens replayed")
+    print(f"[SOAK] Plug-in to gate open {percentiles(connected)}")
+    return failures
+
+
+def soak_payment(args):
+    simulator = PaymentTerminalSimulator(write_time=(args.write_min, args.write_max), seed=args.seed).start()
+    db_path = os.path.join(tempfile.mkdtemp(prefix='pms-soak-'), 'records.db')
+    db = DatabaseManager(db_path)
+    system = PaymentSystem(port=simulator.port, payment_processor=PaymentProcessor(db=db))
+    thread = threading.Thread(target=system.run, daemon=True)
+    thread.start()
+    time.sleep(0.5)  # Let the payment loop subscribe before the first tap
+
+    for index in range(args.cards):
+        plate = f"RA{chr(65 + index // 1000 % 26)}{index % 1000:03d}{chr(65 + index % 26)}"
+        balance = simulator.random.randint(0, 4 * FEE)
+        db.add_entry(plate)
+        simulator.tap(plate, balance, after=(0, args.tap_gap))
+
+    start = time.monotonic()
+    simulator.wait_idle()
+    elapsed = time.monotonic() - start
+    system.stop()
+    thread.join(timeout=3)
+    simulator.stop()
+
+    failures = []
+    paid = {record['car_plate'] for record in db.get_all_records() if record['payment_status'] == 1}
+    for transaction in simulator.transactions:
+        plate, balance = transaction['plate'], transaction['balance']
+        if balance >= FEE:
+            if transaction['status'] != 'paid' or transaction['new_balance'] != balance - FEE:
+                failures.append(f"{plate}: expected payment, got {transaction}")
+            elif plate not in paid:
+                failures.append(f"{plate}: card charged but record not marked paid")
+        elif transaction['status'] != 'denied':
+            failures.append(f"{plate}: expected insufficient balance, got {transaction}")
+
+    latencies = [t['latency'] for t in simulator.transactions if t['status'] == 'paid']
+    print(f"[SOAK] {len(simulator.transactions)} card taps in {elapsed:.1f}s "
+          f"({len(simulator.transactions) / elapsed:.1f}/s), {len(paid)} paid")
+    print(f"[SOAK] Tap to DONE {percentiles(latencies)}")
+    print(f"[SOAK] Database: {db_path}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('loop', choices=('gate', 'late-start', 'payment'))
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible randomized timing")
+    parser.add_argument('--cycles', type=int, default=20, help="Gate: vehicles passing through")
+    parser.add_argument('--interval', type=float, default=0.05, help="Gate: seconds between distance lines")
+    parser.add_argument('--noise', type=float, default=2.0, help="Gate: distance noise in cm")
+    parser.add_argument('--glitch-rate', type=float, default=0.05, help="Gate: share of spurious echoes")
+    parser.add_argument('--open-time', type=float, default=0.3, help="Gate: seconds the gate stays open")
+    parser.add_argument('--cards', type=int, default=50, help="Payment: card taps")
+    parser.add_argument('--tap-gap', type=float, default=0.05, help="Payment: max seconds between taps")
+    parser.add_argument('--write-min', type=float, default=0.02, help="Payment: min card write time")
+    parser.add_argument('--write-max', type=float, default=0.08, help="Payment: max card write time")
+    args = parser.parse_args()
+
+    loops = {'gate': soak_gate, 'late-start': soak_late_start, 'payment': soak_payment}
+    failures = loops[args.loop](args)
+    for failure in failures[:20]:
+        print(f"[SOAK] FAIL {failure}")
+    print(f"[SOAK] {'OK' if not failures else f'{len(failures)} failures'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
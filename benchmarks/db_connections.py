@@ -0,0 +1,122 @@
+# benchmarks/db_connections.py
+"""Per-call latency of DatabaseManager with a connection per call vs. persistent WAL connections.
+
+Replays the calls one car makes at the entry and exit lanes against a
+scratch database, then runs writer and reader threads side by side (as
+the lane, payment and dashboard processes do) and counts lock errors.
+
+Usage: python3 benchmarks/db_connections.py [--cars N] [--threads N]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.database_utils import DatabaseManager
+
+
+class PerCallDatabaseManager(DatabaseManager):
+    """DatabaseManager before connection reuse, kept for comparison"""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def car_calls(db, plate):
+    """The database calls of one entry followed by its exit, timed one by one"""
+    calls = (
+        ('has_unpaid_record', lambda: db.has_unpaid_record(plate)),
+        ('add_entry', lambda: db.add_entry(plate)),
+        ('get_unpaid_record', lambda: db.get_unpaid_record(plate)),
+        ('update_exit_and_payment', lambda: db.update_exit_and_payment(plate, 500)),
+        ('mark_as_paid', lambda: db.mark_as_paid(plate)),
+        ('has_recent_paid_exit', lambda: db.has_recent_paid_exit(plate)),
+        ('add_denial_incident', lambda: db.add_denial_incident(plate, 'Benchmark')),
+    )
+    timings = {}
+    for name, call in calls:
+        start = time.perf_counter()
+        call()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def sequential(db, cars):
+    samples = {}
+    for index in range(cars):
+        for name, seconds in car_calls(db, f"RAB{index % 1000:03d}C").items():
+            samples.setdefault(name, []).append(seconds)
+    return samples
+
+
+def concurrent(db, cars, threads):
+    """Writers replay cars while readers poll like the dashboard; returns (seconds, lock errors)"""
+    errors = []
+    stop = threading.Event()
+
+    def writer(offset):
+        for index in range(cars):
+            try:
+                car_calls(db, f"RA{chr(65 + offset)}{index % 1000:03d}W")
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with db.get_connection() as conn:
+                    conn.execute('SELECT COUNT(*) FROM parking_records WHERE exit_time IS NULL').fetchone()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    writers = [threading.Thread(target=writer, args=(offset,)) for offset in range(threads)]
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    start = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in readers:
+        thread.join()
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cars', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=3, help="Concurrent writer threads")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pms-db-bench-')
+    for label, cls in (('per-call', PerCallDatabaseManager), ('persistent', DatabaseManager)):
+        db = cls(os.path.join(workdir, f'{label}.db'))
+        samples = sequential(db, args.cars)
+        print(f"[DB] {label} connections, {args.cars} cars:")
+        for name, values in samples.items():
+            values = np.array(values) * 1e6
+            print(f"[DB]   {name:24s} p50={np.percentile(values, 50):8.1f} p99={np.percentile(values, 99):8.1f} us")
+        total = sum(sum(values) for values in samples.values())
+        print(f"[DB]   {'per car':24s} {total / args.cars * 1000:.2f} ms")
+
+        elapsed, errors = concurrent(db, args.cars // 2, args.threads)
+        print(f"[DB]   {args.threads} writers + 2 readers: {elapsed:.2f}s, {len(errors)} lock errors")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# benchmarks/detector_backends.py
+"""Time the plate detector on each inference backend to pick the fastest for a lane machine.
+
+Usage: python3 benchmarks/detector_backends.py [--model PATH] [--imgsz N] [--threads N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.thread_limits import limit_threads_env, threads_from_argv
+
+limit_threads_env(threads_from_argv())  # Before torch is imported
+
+from ultralytics import YOLO
+from modules.model_backends import BACKENDS, load_detector, load_verify_frames, verify_detector
+
+
+def bench(model, frames, imgsz, repeat):
+    model(frames[0], imgsz=imgsz, verbose=False)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            model(frame, imgsz=imgsz, verbose=False)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default='models/runs/detect/train/weights/best.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args()
+
+    frames = load_verify_frames()
+    if not frames:
+        print("[BENCH] No saved frames found under images/")
+        return 1
+
+    reference = YOLO(args.model)
+    timings = {}
+    for backend in args.backends:
+        try:
+            model = load_detector(args.model, backend, args.imgsz, args.threads)
+        except Exception as e:
+            print(f"[BENCH] {backend:9s} unavailable: {e}")
+            continue
+
+        ok, message = (True, 'reference') if backend == 'pytorch' else \
+            verify_detector(reference, model, frames, args.imgsz)
+        timings[backend] = bench(model, frames, args.imgsz, args.repeat)
+        print(f"[BENCH] {backend:9s} {timings[backend]:8.1f} ms/frame  "
+              f"{'OK' if ok else 'MISMATCH'} ({message})")
+
+    if timings:
+        fastest = min(timings, key=timings.get)
+        print(f"[BENCH] Fastest: {fastest} -> python3 process_payment.py entry --backend {fastest} "
+              f"--imgsz {args.imgsz}" + (f" --threads {args.threads}" if args.threads else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# benchmarks/ocr_backends.py
+"""Compare OCR backends on saved plate crops.
+
+Usage: python3 benchmarks/ocr_backends.py [crop_dir] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.ocr_backends import PytesseractBackend, TesserocrBackend
+
+
+def load_crops(crop_dir):
+    """Load plate crops (not full frames) preprocessed like PlateRecognizer.preprocess_image"""
+    crops = []
+    for path in sorted(glob.glob(os.path.join(crop_dir, '*.jpg'))):
+        if '_full_' in os.path.basename(path):
+            continue
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        blur = cv2.GaussianBlur(gray, (5, 5), 0)
+        crops.append(cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+    return crops
+
+
+def bench(backend, crops, repeat):
+    backend.read_batch(crops[:1])  # warm up
+    texts = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        texts = backend.read_batch(crops)
+    elapsed = time.perf_counter() - start
+    calls = repeat * len(crops)
+    return {
+        'backend': backend.name,
+        'crops': calls,
+        'ms_per_crop': round(elapsed * 1000 / calls, 2),
+        'crops_per_s': round(calls / elapsed, 1),
+        'texts': texts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('crop_dir', nargs='?', default='images/entry')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    crops = load_crops(args.crop_dir)
+    if not crops:
+        print(f"[BENCH] No plate crops found in {args.crop_dir}")
+        return 1
+
+    backends = [PytesseractBackend()]
+    try:
+        backends.append(TesserocrBackend())
+    except (ImportError, RuntimeError) as e:
+        print(f"[BENCH] Skipping tesserocr: {e}")
+
+    results = [bench(backend, crops, args.repeat) for backend in backends]
+    for result in results:
+        print(f"[BENCH] {result['backend']:12s} {result['ms_per_crop']:8.2f} ms/crop "
+              f"{result['crops_per_s']:8.1f} crops/s  texts={result['texts']}")
+
+    if len(results) == 2:
+        print(f"[BENCH] Speedup: {results[0]['ms_per_crop'] / results[1]['ms_per_crop']:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# benchmarks/preprocess_alloc.py
+"""Compare per-frame allocations of the old and the buffer-reusing plate preprocessing.
+
+Usage: python3 benchmarks/preprocess_alloc.py [--frames N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.preprocess import PlatePreprocessor
+
+
+def legacy_preprocess(plate_img):
+    """PlateRecognizer.preprocess_image before buffer reuse, kept for comparison"""
+    gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    return cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def load_frames():
+    frames = [cv2.imread(path) for path in sorted(glob.glob('images/*/*_full_*.jpg'))]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)]
+    return frames
+
+
+def crop_boxes(frame, index):
+    """Two plate-sized boxes that jitter a little from frame to frame, like a tracked plate"""
+    height, width = frame.shape[:2]
+    jitter = index % 7
+    return [
+        (width // 4 + jitter, height // 2, width // 4 + 180 + jitter, height // 2 + 50 + jitter),
+        (width // 2, height // 3 + jitter, width // 2 + 150 - jitter, height // 3 + 45),
+    ]
+
+
+def measure(preprocess, frames, count, begin_frame=None):
+    """Allocations, allocated bytes and time per frame"""
+    start = time.perf_counter()
+    for index in range(count):
+        frame = frames[index % len(frames)]
+        if begin_frame:
+            begin_frame()
+        for x1, y1, x2, y2 in crop_boxes(frame, index):
+            preprocess(frame[y1:y2, x1:x2])
+    elapsed = time.perf_counter() - start
+
+    # Allocations are counted on the last frame, after the buffer pool has warmed up
+    tracemalloc.start()
+    allocations = allocated = 0
+    for index in range(count):
+        frame = frames[index % len(frames)]
+        before = tracemalloc.take_snapshot() if index == count - 1 else None
+        if begin_frame:
+            begin_frame()
+        outputs = [preprocess(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in crop_boxes(frame, index)]
+        if before is not None:
+            diff = tracemalloc.take_snapshot().compare_to(before, 'filename')
+            allocations = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+            allocated = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+        del outputs
+    tracemalloc.stop()
+    return {
+        'allocations_per_frame': allocations,
+        'bytes_per_frame': allocated,
+        'ms_per_frame': round(elapsed * 1000 / count, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=500)
+    args = parser.parse_args()
+
+    frames = load_frames()
+    preprocessor = PlatePreprocessor()
+
+    legacy = measure(legacy_preprocess, frames, args.frames)
+    buffered = measure(preprocessor.process, frames, args.frames, preprocessor.begin_frame)
+
+    print(f"[BENCH] legacy   {legacy}")
+    print(f"[BENCH] buffered {buffered}")
+    print(f"[BENCH] Buffer pool holds {preprocessor.allocated_bytes()} bytes across "
+          f"{len(preprocessor.pools)} size buckets")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
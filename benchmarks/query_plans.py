@@ -0,0 +1,152 @@
+# benchmarks/query_plans.py
+"""Check that DatabaseManager's lookups use indexes on a large synthetic database.
+
+Fills a scratch database with `--rows` parking records (one year of
+traffic) and a fifth as many denials, archives sessions older than
+ARCHIVE_AFTER_DAYS, runs every read/update method with
+SQL tracing, and runs EXPLAIN QUERY PLAN on each statement. A full table
+scan outside ALLOWED_SCANS fails the check (exit status 1). Each call is
+then timed with and without the indexes.
+
+Usage: python3 benchmarks/query_plans.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.database_utils import DatabaseManager, ARCHIVE_AFTER_DAYS
+
+# Calls that are full scans by design, and why
+ALLOWED_SCANS = {
+    'count_records': 'counts every row',
+    'count_records(archived)': 'counts every row',
+    'search_records(plate)': "substring match '%plate%' cannot use an index",
+}
+
+
+def fill(db, rows, seed=0):
+    """Insert `rows` records and rows // 5 denials spread over the past year"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    letters = 'ABCDEFGHJKLMNPRSTUVWXYZ'
+
+    def plate():
+        return f"RA{rng.choice(letters)}{rng.randint(0, 999):03d}{rng.choice(letters)}"
+
+    records = []
+    for _ in range(rows):
+        entry = now - rng.randint(0, 365 * 86400)
+        exit_time = entry + 60 * rng.randint(5, 600)
+        paid = exit_time < now and rng.random() < 0.98
+        records.append((entry, exit_time if paid else None, plate(), 500 * rng.randint(1, 10) if paid else 0,
+                        int(paid)))
+    denials = [(plate(), now - rng.randint(0, 365 * 86400),
+                rng.choice(('Unpaid parking record', 'Cooldown period active', 'No entry record found')))
+               for _ in range(rows // 5)]
+
+    with db.get_connection() as conn:
+        conn.executemany('''INSERT INTO parking_records (entry_time, exit_time, car_plate, due_payment, payment_status)
+                            VALUES (?, ?, ?, ?, ?)''', records)
+        conn.executemany('INSERT INTO denial_incidents (plate, denial_time, reason) VALUES (?, ?, ?)', denials)
+        conn.commit()
+        conn.execute('ANALYZE')
+    db.rebuild_stats()  # Rows were inserted directly, bypassing the rollup updates
+
+
+def calls(db):
+    """(name, call) for every read and update method of DatabaseManager"""
+    plate, today = 'RAB123C', datetime.now().strftime('%Y-%m-%d')
+    return (
+        ('has_unpaid_record', lambda: db.has_unpaid_record(plate)),
+        ('get_unpaid_record', lambda: db.get_unpaid_record(plate)),
+        ('has_recent_paid_exit', lambda: db.has_recent_paid_exit(plate)),
+        ('has_recent_denial', lambda: db.has_recent_denial(plate, 'Unpaid parking record')),
+        ('update_exit_and_payment', lambda: db.update_exit_and_payment('RAZ999Z', 0)),
+        ('mark_as_paid', lambda: db.mark_as_paid('RAZ999Z')),
+        ('get_daily_stats', lambda: db.get_daily_stats()),
+        ('get_hourly_stats', lambda: db.get_hourly_stats()),
+        ('get_records', lambda: db.get_records(20, 0)),
+        ('get_records(archived)', lambda: db.get_records(20, 0, include_archived=True)),
+        ('count_records', lambda: db.count_records()),
+        ('count_records(archived)', lambda: db.count_records(include_archived=True)),
+        ('search_records(day)', lambda: db.search_records(day=today)),
+        ('search_records(archived)', lambda: db.search_records(day=today, include_archived=True)),
+        ('search_records(plate)', lambda: db.search_records(plate='B12')),
+    )
+
+
+def traced_statements(db, call):
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))]
+
+
+def full_scans(conn, sql):
+    """Tables a statement reads without any index (scans of views are checked through their tables)"""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    return [row[3] for row in plan
+            if row[3].startswith('SCAN ') and 'USING' not in row[3] and row[3].split()[1] in tables]
+
+
+def timed(call, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(prefix='pms-plans-'), 'records.db'))
+    start = time.perf_counter()
+    fill(db, args.rows)
+    print(f"[PLANS] {args.rows} records generated in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    moved = db.archive_closed_sessions(ARCHIVE_AFTER_DAYS)
+    print(f"[PLANS] {moved} sessions archived in {time.perf_counter() - start:.1f}s")
+
+    failures = []
+    with db.get_connection() as conn:
+        for name, call in calls(db):
+            for sql in traced_statements(db, call):
+                scans = full_scans(conn, sql)
+                if scans and name not in ALLOWED_SCANS:
+                    failures.append(f"{name}: {', '.join(scans)} in {' '.join(sql.split())}")
+
+    indexed = {name: timed(call) for name, call in calls(db)}
+    with db.get_connection() as conn:
+        indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall()
+        for (index,) in indexes:
+            conn.execute(f'DROP INDEX {index}')
+        conn.commit()
+    unindexed = {name: timed(call, repeat=1) for name, call in calls(db)}
+
+    print(f"[PLANS] {'call':24s} {'indexed':>10s} {'no index':>10s}")
+    for name in indexed:
+        note = f"  (scan: {ALLOWED_SCANS[name]})" if name in ALLOWED_SCANS else ''
+        print(f"[PLANS] {name:24s} {indexed[name] * 1000:8.2f}ms {unindexed[name] * 1000:8.2f}ms{note}")
+
+    for failure in failures:
+        print(f"[PLANS] FAIL {failure}")
+    print(f"[PLANS] {'OK' if not failures else f'{len(failures)} full scans'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
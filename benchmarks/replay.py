@@ -0,0 +1,249 @@
+# benchmarks/replay.py
+"""Replay recorded footage through PlateRecognizer and report speed and accuracy.
+
+The source is either a video file or a directory of saved frames. Saved
+frames are named `<PLATE>_...jpg` (as written by ImageManager), so the
+filename gives the expected plate; each frame is replayed `--frames-per-image`
+times as a stationary car. For a video, pass the expected plate with `--plate`.
+
+Usage:
+    python3 benchmarks/replay.py images/entry --output bench.json
+    python3 benchmarks/replay.py lane.mp4 --plate RAH971B --baseline bench.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.thread_limits import limit_threads_env, threads_from_argv
+
+limit_threads_env(threads_from_argv())  # Before numpy/torch are imported
+
+import cv2
+import numpy as np
+
+from modules.model_backends import BACKENDS
+from modules.ocr_utilis import PlateRecognizer
+
+STAGES = ('detect', 'preprocess', 'ocr', 'validate')
+
+
+def plate_from_filename(path):
+    return os.path.basename(path).split('_')[0].upper()
+
+
+def load_vehicles(source, pattern, plate):
+    """Yield (expected_plate, frames) for each vehicle in the source"""
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, pattern))):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield plate_from_filename(path), [frame]
+        return
+
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    yield plate or plate_from_filename(source), frames
+
+
+def percentiles(samples):
+    if not samples:
+        return {'p50': None, 'p90': None, 'p99': None, 'mean': None}
+    values = np.array(samples) * 1000
+    return {
+        'p50': round(float(np.percentile(values, 50)), 2),
+        'p90': round(float(np.percentile(values, 90)), 2),
+        'p99': round(float(np.percentile(values, 99)), 2),
+        'mean': round(float(values.mean()), 2),
+    }
+
+
+def replay(recognizer, vehicles, frames_per_image):
+    """Run every vehicle through the recognizer and collect raw measurements"""
+    stage_samples = {stage: [] for stage in STAGES}
+    frame_times = []
+    per_vehicle = []
+    reads = correct_reads = 0
+
+    for expected, frames in vehicles:
+        recognizer.reset()
+        still = len(frames) == 1
+        if still:
+            frames = frames * frames_per_image
+
+        consensus, frames_to_consensus = None, None
+        for index, frame in enumerate(frames, start=1):
+            start = time.perf_counter()
+            detected_plates, _ = recognizer.detect_plates(frame)
+            decided = None
+            for plate_data in detected_plates:
+                if plate_data['resolved']:
+                    continue
+                reads += 1
+                correct_reads += plate_data['plate'] == expected
+                decided = recognizer.get_consensus_plate(
+                    plate_data['plate'], plate_data['track_id'], plate_data['weight']
+                ) or decided
+            frame_times.append(time.perf_counter() - start)
+
+            for stage, seconds in recognizer.last_timings.items():
+                stage_samples[stage].append(seconds)
+
+            if decided and consensus is None:
+                consensus, frames_to_consensus = decided, index
+                if still:
+                    break  # Nothing more to learn from replaying a still image
+
+        per_vehicle.append({
+            'expected': expected,
+            'consensus': consensus,
+            'correct': consensus == expected,
+            'frames_to_consensus': frames_to_consensus,
+        })
+
+    return stage_samples, frame_times, per_vehicle, reads, correct_reads
+
+
+def summarize(args, recognizer, stage_samples, frame_times, per_vehicle, reads, correct_reads):
+    decided = [v['frames_to_consensus'] for v in per_vehicle if v['frames_to_consensus']]
+    total_time = sum(frame_times)
+    return {
+        'source': args.source,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'config': {
+            'backend': recognizer.backend,
+            'imgsz': recognizer.imgsz,
+            'detect_width': recognizer.detect_width,
+            'box_padding': recognizer.box_padding,
+            'threads': args.threads,
+            'ocr_backend': recognizer.ocr.name,
+            'motion_gating': args.motion_gating,
+            'correct_plates': recognizer.correct_plates,
+            'frames_per_image': args.frames_per_image,
+        },
+        'frames': len(frame_times),
+        'fps': round(len(frame_times) / total_time, 2) if total_time else None,
+        'latency_ms': dict(
+            {stage: percentiles(samples) for stage, samples in stage_samples.items()},
+            frame=percentiles(frame_times)
+        ),
+        'frames_to_consensus': {
+            'mean': round(float(np.mean(decided)), 2) if decided else None,
+            'max': max(decided) if decided else None,
+            'undecided': len(per_vehicle) - len(decided),
+        },
+        'accuracy': {
+            'vehicles': len(per_vehicle),
+            'consensus': round(sum(v['correct'] for v in per_vehicle) / len(per_vehicle), 3) if per_vehicle else None,
+            'reads': reads,
+            'read': round(correct_reads / reads, 3) if reads else None,
+        },
+        'counters': recognizer.stats(),
+        'vehicles': per_vehicle,
+    }
+
+
+def correction_savings(with_correction, without_correction, frames_per_image):
+    """Frames saved by plate correction, per vehicle, on the same replay set"""
+    saved, recovered = 0, 0
+    for corrected, strict in zip(with_correction, without_correction):
+        frames_with = corrected['frames_to_consensus'] or frames_per_image
+        frames_without = strict['frames_to_consensus'] or frames_per_image
+        saved += frames_without - frames_with
+        recovered += corrected['correct'] and not strict['correct']
+    return {'frames_saved': saved, 'vehicles_recovered': recovered}
+
+
+def compare(report, baseline):
+    """Print the change of the headline numbers against a previous report"""
+    def delta(label, new, old, lower_is_better=False):
+        if new is None or old is None:
+            return
+        change = new - old
+        worse = change > 0 if lower_is_better else change < 0
+        flag = ' REGRESSION' if worse and abs(change) > 0.05 * max(abs(old), 1e-9) else ''
+        print(f"[REPLAY] {label:28s} {old:>10} -> {new:>10} ({change:+.2f}){flag}")
+
+    delta('fps', report['fps'], baseline['fps'])
+    for stage in STAGES + ('frame',):
+        delta(f'{stage} p50 ms', report['latency_ms'][stage]['p50'], baseline['latency_ms'][stage]['p50'], True)
+        delta(f'{stage} p99 ms', report['latency_ms'][stage]['p99'], baseline['latency_ms'][stage]['p99'], True)
+    delta('frames to consensus', report['frames_to_consensus']['mean'],
+          baseline['frames_to_consensus']['mean'], True)
+    delta('consensus accuracy', report['accuracy']['consensus'], baseline['accuracy']['consensus'])
+    delta('read accuracy', report['accuracy']['read'], baseline['accuracy']['read'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help="Video file or directory of saved frames")
+    parser.add_argument('--pattern', default='*_full_*.jpg', help="Frame filename pattern inside a directory")
+    parser.add_argument('--plate', help="Expected plate for a video source")
+    parser.add_argument('--frames-per-image', type=int, default=10)
+    parser.add_argument('--model', default='models/runs/detect/train/weights/best.pt')
+    parser.add_argument('--backend', choices=BACKENDS, default='pytorch')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--detect-width', type=int, default=None,
+                        help="Run detection on frames downscaled to this width; crop plates at full resolution")
+    parser.add_argument('--box-padding', type=float, default=0.0, help="Margin added around boxes, fraction of size")
+    parser.add_argument('--ocr-backend', default='auto')
+    parser.add_argument('--motion-gating', action='store_true', help="Enable ROI change gating")
+    parser.add_argument('--no-correction', action='store_true', help="Only accept exact plate reads")
+    parser.add_argument('--compare-correction', action='store_true',
+                        help="Replay again without plate correction and report the frames it saves")
+    parser.add_argument('--output', help="Write the JSON report here")
+    parser.add_argument('--baseline', help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    recognizer = PlateRecognizer(
+        args.model, ocr_backend=args.ocr_backend, motion_gating=args.motion_gating,
+        backend=args.backend, imgsz=args.imgsz, threads=args.threads,
+        correct_plates=not args.no_correction, detect_width=args.detect_width, box_padding=args.box_padding
+    )
+    vehicles = list(load_vehicles(args.source, args.pattern, args.plate))
+    if not vehicles:
+        print(f"[REPLAY] Nothing to replay in {args.source}")
+        return 1
+
+    report = summarize(args, recognizer, *replay(recognizer, vehicles, args.frames_per_image))
+
+    if args.compare_correction and recognizer.correct_plates:
+        recognizer.correct_plates = False
+        strict = replay(recognizer, vehicles, args.frames_per_image)[2]
+        recognizer.correct_plates = True
+        report['correction'] = dict(
+            correction_savings(report['vehicles'], strict, args.frames_per_image),
+            corrected_reads=report['counters'].get('corrected_reads', 0)
+        )
+
+    print(f"[REPLAY] {report['frames']} frames at {report['fps']} FPS")
+    for stage, values in report['latency_ms'].items():
+        print(f"[REPLAY] {stage:10s} p50={values['p50']} p90={values['p90']} p99={values['p99']} ms")
+    print(f"[REPLAY] Frames to consensus: {report['frames_to_consensus']}")
+    print(f"[REPLAY] Accuracy: {report['accuracy']}")
+    if 'correction' in report:
+        print(f"[REPLAY] Plate correction: {report['correction']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[REPLAY] Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
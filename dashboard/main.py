@@ -2,13 +2,14 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 import json
-from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import asyncio
 from pathlib import Path
 import os
+import urllib.request
+import urllib.error
 
 # Add parent directory to path to import modules
 import sys
@@ -16,7 +17,8 @@ import sys
 from starlette.responses import PlainTextResponse
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from modules.database_utils import DatabaseManager
+from modules.database_utils import DatabaseManager, format_record
+from modules.preview import DEFAULT_PREVIEW_PORTS, PREVIEW_KINDS
 
 app = FastAPI(title="Parking Management Dashboard", version="1.0.0")
 
@@ -28,6 +30,10 @@ app.mount("/static", StaticFiles(directory="/home/hrh/Documents/Workspace/PMS/da
 # Initialize database
 db = DatabaseManager()
 
+# Preview servers of headless entry/exit/multi processes on this machine
+PREVIEW_SOURCES = {mode: f"http://127.0.0.1:{port}" for mode, port in DEFAULT_PREVIEW_PORTS.items()}
+PREVIEW_FPS = 10
+
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -64,76 +70,20 @@ async def dashboard_home(request: Request):
 @app.get("/api/stats")
 async def get_dashboard_stats():
     """Get dashboard statistics"""
-    with db.get_connection() as conn:
-        # Total vehicles today
-        today = datetime.now().strftime('%Y-%m-%d')
-        total_today = conn.execute(
-            "SELECT COUNT(*) FROM parking_records WHERE DATE(entry_time) = ?",
-            (today,)
-        ).fetchone()[0]
-
-        # Currently parked (unpaid records)
-        currently_parked = conn.execute(
-            "SELECT COUNT(*) FROM parking_records WHERE payment_status = 0"
-        ).fetchone()[0]
-
-        # Total revenue today
-        revenue_today = conn.execute(
-            "SELECT COALESCE(SUM(due_payment), 0) FROM parking_records WHERE DATE(entry_time) = ? AND payment_status = 1",
-            (today,)
-        ).fetchone()[0]
-
-        # Average parking duration (in minutes)
-        avg_duration = conn.execute(
-            """SELECT AVG(
-                CASE 
-                    WHEN exit_time IS NOT NULL 
-                    THEN (julianday(exit_time) - julianday(entry_time)) * 24 * 60 
-                    ELSE NULL 
-                END
-            ) FROM parking_records WHERE DATE(entry_time) = ?""",
-            (today,)
-        ).fetchone()[0] or 0
-
-    return {
-        "total_today": total_today,
-        "currently_parked": currently_parked,
-        "revenue_today": float(revenue_today),
-        "avg_duration": round(avg_duration, 1)
-    }
+    return db.get_daily_stats()
 
 
 @app.get("/api/recent-activities")
 async def get_recent_activities():
     """Get recent parking activities"""
-    with db.get_connection() as conn:
-        activities = conn.execute(
-            """SELECT car_plate, entry_time, exit_time, due_payment, payment_status
-               FROM parking_records 
-               ORDER BY entry_time DESC 
-               LIMIT 10"""
-        ).fetchall()
-
-    return [dict(activity) for activity in activities]
+    fields = ('car_plate', 'entry_time', 'exit_time', 'due_payment', 'payment_status')
+    return [{field: activity[field] for field in fields} for activity in map(format_record, db.get_records(limit=10))]
 
 
 @app.get("/api/hourly-data")
 async def get_hourly_data():
     """Get hourly parking data for charts"""
-    today = datetime.now().strftime('%Y-%m-%d')
-
-    with db.get_connection() as conn:
-        hourly_data = conn.execute(
-            """SELECT 
-                strftime('%H', entry_time) as hour,
-                COUNT(*) as entries,
-                COALESCE(SUM(CASE WHEN payment_status = 1 THEN due_payment ELSE 0 END), 0) as revenue
-               FROM parking_records 
-               WHERE DATE(entry_time) = ?
-               GROUP BY strftime('%H', entry_time)
-               ORDER BY hour""",
-            (today,)
-        ).fetchall()
+    hourly_data = db.get_hourly_stats()
 
     # Fill missing hours with zeros
     hours_data = {str(i).zfill(2): {"entries": 0, "revenue": 0} for i in range(24)}
@@ -148,22 +98,14 @@ async def get_hourly_data():
 
 
 @app.get("/api/parking-records")
-async def get_parking_records(page: int = 1, limit: int = 20):
-    """Get paginated parking records"""
+async def get_parking_records(page: int = 1, limit: int = 20, include_archived: bool = False):
+    """Get paginated parking records, optionally including archived sessions"""
     offset = (page - 1) * limit
-
-    with db.get_connection() as conn:
-        records = conn.execute(
-            """SELECT * FROM parking_records 
-               ORDER BY entry_time DESC 
-               LIMIT ? OFFSET ?""",
-            (limit, offset)
-        ).fetchall()
-
-        total = conn.execute("SELECT COUNT(*) FROM parking_records").fetchone()[0]
+    records = db.get_records(limit, offset, include_archived)
+    total = db.count_records(include_archived)
 
     return {
-        "records": [dict(record) for record in records],
+        "records": [format_record(record) for record in records],
         "total": total,
         "page": page,
         "pages": (total + limit - 1) // limit
@@ -171,25 +113,9 @@ async def get_parking_records(page: int = 1, limit: int = 20):
 
 
 @app.get("/api/search")
-async def search_records(plate: str = None, date: str = None):
-    """Search parking records"""
-    query = "SELECT * FROM parking_records WHERE 1=1"
-    params = []
-
-    if plate:
-        query += " AND car_plate LIKE ?"
-        params.append(f"%{plate}%")
-
-    if date:
-        query += " AND DATE(entry_time) = ?"
-        params.append(date)
-
-    query += " ORDER BY entry_time DESC LIMIT 50"
-
-    with db.get_connection() as conn:
-        records = conn.execute(query, params).fetchall()
-
-    return [dict(record) for record in records]
+async def search_records(plate: str = None, date: str = None, include_archived: bool = False):
+    """Search parking records, optionally including archived sessions"""
+    return [format_record(record) for record in db.search_records(plate, date, include_archived=include_archived)]
 
 
 @app.get("/api/logs", response_class=PlainTextResponse)
@@ -207,6 +133,47 @@ async def read_logs(lines: int = 100):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading log file: {str(e)}")
 
+def fetch_preview(url: str):
+    """Fetch one JPEG from a lane's preview server, or None if unavailable"""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            return response.read()
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+@app.get("/api/preview/{source}/lanes")
+async def get_preview_lanes(source: str):
+    """Lanes a preview source currently publishes"""
+    if source not in PREVIEW_SOURCES:
+        raise HTTPException(status_code=404, detail="Unknown preview source")
+    body = await asyncio.to_thread(fetch_preview, f"{PREVIEW_SOURCES[source]}/lanes")
+    if body is None:
+        raise HTTPException(status_code=503, detail="Preview source not running")
+    return json.loads(body)
+
+
+@app.get("/api/preview/{source}/{lane}/{kind}")
+async def stream_preview(request: Request, source: str, lane: str, kind: str = "annotated"):
+    """
+    MJPEG stream of a lane's camera or plate preview.
+    Frames are only encoded by the lane process while a client is connected.
+    """
+    if source not in PREVIEW_SOURCES or kind not in PREVIEW_KINDS:
+        raise HTTPException(status_code=404, detail="Unknown preview")
+    url = f"{PREVIEW_SOURCES[source]}/{lane}/{kind}.jpg"
+
+    async def frames():
+        while not await request.is_disconnected():
+            jpeg = await asyncio.to_thread(fetch_preview, url)
+            if jpeg:
+                yield (b"--frame\r\nContent-Type: image/jpeg\r\n"
+                       + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+            await asyncio.sleep(1 / PREVIEW_FPS)
+
+    return StreamingResponse(frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates"""
@@ -0,0 +1,230 @@
+# modules/arduino_simulator.py
+"""Software stand-ins for the gate and payment Arduinos on a Linux pseudo-terminal.
+
+Each simulator opens a pty and speaks the same line protocol as the
+sketches in `arduino/`, so GateController and PaymentSystem can be pointed
+at `simulator.port` instead of real hardware. Timing values are either a
+number of seconds or a (low, high) range sampled with the simulator's
+seeded random generator.
+"""
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+from collections import deque
+
+NO_ECHO_DISTANCE = 9999.99  # What readDistance() reports when the echo times out
+
+
+class ArduinoSimulator:
+    """Pseudo-terminal plumbing shared by the simulated sketches"""
+
+    name = 'ARDUINO'
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.received = []  # (time, line or command) as seen by the sketch
+        self._buffer = b''
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._threads = []
+
+    def delay(self, timing):
+        """Seconds for a timing spec: a number or a (low, high) range"""
+        if isinstance(timing, (tuple, list)):
+            return self.random.uniform(*timing)
+        return timing or 0.0
+
+    def write_line(self, line):
+        with self._write_lock:
+            os.write(self.master, f"{line}\r\n".encode())
+
+    def read_input(self, timeout):
+        """Bytes the host sent, or b'' after `timeout` seconds"""
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b''
+        try:
+            return os.read(self.master, 1024)
+        except OSError:
+            return b''
+
+    def read_line(self, timeout):
+        """Next newline-terminated line from the host, or None on timeout"""
+        deadline = time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                return None
+            self._buffer += self.read_input(min(remaining, 0.1))
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line.decode('utf-8', errors='replace').strip()
+
+    def _spawn(self, target):
+        thread = threading.Thread(target=target, name=f"{self.name.lower()}-simulator", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        print(f"[{self.name} SIM] Listening on {self.port}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class GateSimulator(ArduinoSimulator):
+    """gate_control.ino: streams distances, obeys `1` open, `0` close, `2` alert
+
+    Like the sketch, no distances are sent while the gate is open. The
+    distance is set directly with `set_distance`, or follows `script`, a
+    list of (seconds after start, distance) steps. `noise` adds a uniform
+    error in cm and `glitch_rate` is the share of samples replaced by a
+    spurious echo, to exercise the presence filter.
+    """
+
+    name = 'GATE'
+
+    def __init__(self, interval=0.05, script=None, noise=0.0, glitch_rate=0.0, seed=None):
+        super().__init__(seed)
+        self.interval = interval
+        self.script = deque(sorted(script or []))
+        self.noise = noise
+        self.glitch_rate = glitch_rate
+        self.distance = NO_ECHO_DISTANCE
+        self.gate_open = False
+        self.alerts = 0
+        self.distance_changes = []  # (time, distance) for latency measurements
+        self.started_at = None
+
+    def set_distance(self, distance):
+        self.distance = distance
+        self.distance_changes.append((time.monotonic(), distance))
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._spawn(self._loop)
+        return super().start()
+
+    def _handle_commands(self, data):
+        for command in data.decode('ascii', errors='ignore'):
+            if command not in '012':
+                continue
+            self.received.append((time.monotonic(), command))
+            if command == '1':
+                self.gate_open = True
+            elif command == '0':
+                self.gate_open = False
+            else:
+                self.alerts += 1
+
+    def _sample(self):
+        if self.glitch_rate and self.random.random() < self.glitch_rate:
+            return self.random.choice((NO_ECHO_DISTANCE, self.random.uniform(5, 400)))
+        if self.distance == NO_ECHO_DISTANCE:
+            return NO_ECHO_DISTANCE
+        return max(0.0, self.distance + self.random.uniform(-self.noise, self.noise))
+
+    def _loop(self):
+        while not self._stop.is_set():
+            elapsed = time.monotonic() - self.started_at
+            while self.script and self.script[0][0] <= elapsed:
+                self.set_distance(self.script.popleft()[1])
+            if not self.gate_open:
+                self.write_line(f"{self._sample():.2f}")
+            self._handle_commands(self.read_input(self.delay(self.interval)))
+
+
+class PaymentTerminalSimulator(ArduinoSimulator):
+    """payment_processor.ino: card taps, the READY handshake, balance write-back
+
+    `tap` queues a card; the terminal sends `PLATE,BALANCE` and `READY`,
+    then waits up to `response_timeout` for the new balance (or `I`), takes
+    `write_time` to write it to the card and answers `DONE`. Every tap ends
+    up in `transactions` with its outcome and tap-to-DONE latency.
+    """
+
+    name = 'PAYMENT'
+
+    def __init__(self, write_time=(0.02, 0.08), ready_delay=0.0, response_timeout=10.0, seed=None):
+        super().__init__(seed)
+        self.write_time = write_time
+        self.ready_delay = ready_delay
+        self.response_timeout = response_timeout
+        self.taps = deque()
+        self.transactions = []
+        self._busy = False
+        self._tapped = threading.Event()
+        self._idle = threading.Condition()
+
+    def tap(self, plate, balance, after=0.0):
+        """Present a card, `after` seconds after the previous one finished"""
+        with self._idle:
+            self.taps.append((plate, balance, after))
+        self._tapped.set()
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued tap has been handled"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.taps and not self._busy, timeout)
+
+    def start(self):
+        self._spawn(self._loop)
+        return super().start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self._tapped.wait(0.1):
+                continue
+            with self._idle:
+                if not self.taps:
+                    self._tapped.clear()
+                    continue
+                plate, balance, after = self.taps.popleft()
+                self._busy = True
+            time.sleep(self.delay(after))
+            self.transactions.append(self._transaction(plate, balance))
+            with self._idle:
+                self._busy = False
+                self._idle.notify_all()
+
+    def _transaction(self, plate, balance):
+        tapped_at = time.monotonic()
+        self._buffer = b''
+        self.write_line(f"{plate},{balance}")
+        time.sleep(self.delay(self.ready_delay))
+        self.write_line("READY")
+
+        result = {'plate': plate, 'balance': balance, 'new_balance': None, 'latency': None}
+        response = self.read_line(self.response_timeout)
+        if response is None:
+            self.write_line("[TIMEOUT] No response from PC. Resetting.")
+            result['status'] = 'timeout'
+            return result
+
+        self.received.append((time.monotonic(), response))
+        self.write_line(f"[RECEIVED FROM PC]: {response}")
+        if response == 'I':
+            self.write_line("[DENIED] Insufficient balance")
+            result['status'] = 'denied'
+        elif response.lstrip('-').isdigit() and int(response) >= 0:
+            self.write_line("[WRITING] New balance to card...")
+            time.sleep(self.delay(self.write_time))
+            self.write_line("DONE")
+            self.write_line(f"[UPDATED] New Balance: {response}")
+            result.update(status='paid', new_balance=int(response))
+        else:
+            self.write_line("[ERROR] Invalid new balance received.")
+            result['status'] = 'invalid'
+        result['latency'] = time.monotonic() - tapped_at
+        return result
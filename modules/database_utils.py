@@ -1,25 +1,314 @@
 import sqlite3
 import csv
 import os
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
 from contextlib import contextmanager
+from modules.denial_log import DenialLog
+from modules.occupancy_index import OccupancyIndex
+
+
+# Applied to every new connection. WAL lets the entry, exit, payment and
+# dashboard processes read while one of them writes.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # Durable across app crashes; WAL keeps the file consistent on power loss
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',  # 8 MB page cache
+)
+
+# Times are stored as integer epoch seconds; this is how they are shown
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_epoch(value):
+    """Epoch seconds from an epoch number or a local TIME_FORMAT string"""
+    if isinstance(value, str):
+        return int(time.mktime(time.strptime(value, TIME_FORMAT)))
+    return int(value)
+
+
+def format_time(epoch):
+    """Local TIME_FORMAT string of an epoch time, None stays None"""
+    return None if epoch is None else time.strftime(TIME_FORMAT, time.localtime(epoch))
+
+
+def format_record(record):
+    """A record as a dict with readable times, for display and JSON"""
+    record = dict(record)
+    for column in ('entry_time', 'exit_time', 'denial_time'):
+        if column in record:
+            record[column] = format_time(record[column])
+    return record
+
+
+def day_range(day=None):
+    """[start, end) epoch bounds of a local 'YYYY-MM-DD' day (today by default)"""
+    start = datetime.strptime(day, '%Y-%m-%d') if day else datetime.now().replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+def migration_1_indexes(conn):
+    """Indexes for plate and time lookups"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_plate_status ON parking_records (car_plate, payment_status)')
+    # Partial index: only cars still parked, which keeps the occupancy count cheap
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_unpaid ON parking_records (car_plate) WHERE payment_status = 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_entry_time ON parking_records (entry_time)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_exit_time ON parking_records (exit_time)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_denials_plate_reason_time ON denial_incidents (plate, reason, denial_time)')
+
+
+def _epoch_sql(column):
+    # The 'utc' modifier reads the stored text as local time, like the code that wrote it
+    return f"CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
+
+
+# TIME_FORMAT text as written before migration 2
+_LEGACY_TIME_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+
+
+def _unparsable_sql(columns):
+    """SQL condition true when any of the (legacy text) time columns is set but not a valid TIME_FORMAT time"""
+    return ' OR '.join(
+        f"({column} IS NOT NULL AND ({column} NOT GLOB '{_LEGACY_TIME_GLOB}' "
+        f"OR strftime('%s', {column}, 'utc') IS NULL))"
+        for column in columns
+    )
+
+
+def _set_aside_unparsable(conn, table, columns):
+    """Move rows whose times cannot be converted to rejected_<table>, untouched, and report them"""
+    condition = _unparsable_sql(columns)
+    ids = [row[0] for row in conn.execute(f'SELECT id FROM {table} WHERE {condition} ORDER BY id')]
+    if not ids:
+        return
+    conn.execute(f'CREATE TABLE IF NOT EXISTS rejected_{table} AS SELECT * FROM {table} WHERE 0')
+    conn.execute(f'INSERT INTO rejected_{table} SELECT * FROM {table} WHERE {condition}')
+    conn.execute(f'DELETE FROM {table} WHERE {condition}')
+    shown = ', '.join(map(str, ids[:20])) + (' ...' if len(ids) > 20 else '')
+    print(f"[DATABASE] {len(ids)} {table} rows have unparsable times and were moved to "
+          f"rejected_{table} as they were (ids {shown})")
+
+
+def migration_2_epoch_times(conn):
+    """Integer epoch seconds for entry, exit and denial times"""
+    # Converting text that does not parse would give NULL (or 0), so such rows are set aside first
+    _set_aside_unparsable(conn, 'parking_records', ('entry_time', 'exit_time'))
+    _set_aside_unparsable(conn, 'denial_incidents', ('denial_time',))
+    conn.execute('''
+        CREATE TABLE parking_records_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_time INTEGER NOT NULL,
+            exit_time INTEGER,
+            car_plate TEXT NOT NULL,
+            due_payment REAL DEFAULT 0,
+            payment_status INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO parking_records_new (id, entry_time, exit_time, car_plate, due_payment, payment_status, created_at)
+        SELECT id, {_epoch_sql('entry_time')}, {_epoch_sql('exit_time')}, car_plate, due_payment, payment_status,
+               created_at
+        FROM parking_records
+    ''')
+    conn.execute('''
+        CREATE TABLE denial_incidents_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plate TEXT NOT NULL,
+            denial_time INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO denial_incidents_new (id, plate, denial_time, reason, created_at)
+        SELECT id, plate, {_epoch_sql('denial_time')}, reason, created_at FROM denial_incidents
+    ''')
+    for table in ('parking_records', 'denial_incidents'):
+        conn.execute(f'DROP TABLE {table}')  # Drops its indexes too
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    migration_1_indexes(conn)
+
+
+def migration_3_archive(conn):
+    """Archive table for old paid sessions, and a view over both"""
+    conn.execute('''
+        CREATE TABLE archived_parking_records (
+            id INTEGER PRIMARY KEY,
+            entry_time INTEGER NOT NULL,
+            exit_time INTEGER,
+            car_plate TEXT NOT NULL,
+            due_payment REAL DEFAULT 0,
+            payment_status INTEGER DEFAULT 0,
+            created_at TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_archive_plate ON archived_parking_records (car_plate)')
+    conn.execute('CREATE INDEX idx_archive_entry_time ON archived_parking_records (entry_time)')
+    conn.execute('''
+        CREATE VIEW all_parking_records AS
+        SELECT * FROM parking_records UNION ALL SELECT * FROM archived_parking_records
+    ''')
+
+
+# Rollup periods: table -> strftime format of its local-time key
+STATS_PERIODS = {'hourly_stats': '%Y-%m-%d %H', 'daily_stats': '%Y-%m-%d'}
+
+
+def bump_stats(conn, epoch, **deltas):
+    """Add `deltas` (entries, exits, revenue, duration_sum, durations, denials) to the hour and day of `epoch`"""
+    columns = ', '.join(deltas)
+    placeholders = ', '.join('?' * len(deltas))
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in deltas)
+    for table, key_format in STATS_PERIODS.items():
+        conn.execute(
+            f'INSERT INTO {table} (period, {columns}) VALUES (?, {placeholders}) '
+            f'ON CONFLICT(period) DO UPDATE SET {updates}',
+            (time.strftime(key_format, time.localtime(epoch)), *deltas.values())
+        )
+
+
+def rebuild_stats(conn):
+    """Recompute the rollup tables from all parking records and denials
+
+    Entries, revenue and stays count towards the period of the entry (as
+    the dashboard reports them), exits and denials towards their own time.
+    """
+    for table, key_format in STATS_PERIODS.items():
+        def period(column):
+            return f"strftime('{key_format}', {column}, 'unixepoch', 'localtime')"
+        conn.execute(f'DELETE FROM {table}')
+        conn.execute(f'''
+            INSERT INTO {table} (period, entries, revenue, duration_sum, durations)
+            SELECT {period('entry_time')}, COUNT(*),
+                   COALESCE(SUM(CASE WHEN payment_status = 1 THEN due_payment ELSE 0 END), 0),
+                   COALESCE(SUM(exit_time - entry_time), 0), COUNT(exit_time)
+            FROM all_parking_records GROUP BY 1
+        ''')
+        conn.execute(f'''
+            INSERT INTO {table} (period, exits)
+            SELECT {period('exit_time')}, COUNT(*) FROM all_parking_records WHERE exit_time IS NOT NULL GROUP BY 1
+            ON CONFLICT(period) DO UPDATE SET exits = excluded.exits
+        ''')
+        conn.execute(f'''
+            INSERT INTO {table} (period, denials)
+            SELECT {period('denial_time')}, COUNT(*) FROM denial_incidents WHERE true GROUP BY 1
+            ON CONFLICT(period) DO UPDATE SET denials = excluded.denials
+        ''')
+
+
+def migration_4_stats(conn):
+    """Hourly and daily rollups of entries, exits, revenue, stays and denials"""
+    for table in STATS_PERIODS:
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                period TEXT PRIMARY KEY,
+                entries INTEGER NOT NULL DEFAULT 0,
+                exits INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                duration_sum INTEGER NOT NULL DEFAULT 0,
+                durations INTEGER NOT NULL DEFAULT 0,
+                denials INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+    rebuild_stats(conn)
+
+
+# Outcome of admit_entry / authorize_exit. `record_id` is the new or matching
+# parking record, `denial_logged` whether the denial was queued (False within its cooldown).
+Decision = namedtuple('Decision', 'allowed reason record_id denial_logged')
+
+DENIAL_COOLDOWN_MINUTES = 5
+
+
+# Applied in order; the database's user_version is the number already applied
+MIGRATIONS = (
+    migration_1_indexes,
+    migration_2_epoch_times,
+    migration_3_archive,
+    migration_4_stats,
+)
+
+# Paid sessions that left longer ago than this are moved to archived_parking_records
+ARCHIVE_AFTER_DAYS = 90
+
+
+def records_table(include_archived=False):
+    """Table to read parking records from: the hot table, or the view that adds the archive"""
+    return 'all_parking_records' if include_archived else 'parking_records'
 
 
 class DatabaseManager:
     def __init__(self, db_path='/home/hrh/Documents/Workspace/data/records.db'):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.occupancy = OccupancyIndex()
+        self.denials = DenialLog(self, cooldown=DENIAL_COOLDOWN_MINUTES * 60)
         self.init_database()
 
+    def _connect(self):
+        # Only used by the creating thread; check_same_thread is off so close() can reach it
+        conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for this thread's persistent database connection
+
+        The connection stays open between calls; an exception rolls back
+        whatever the block left uncommitted.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._connections_lock:
+                self._connections.append(conn)
         try:
             yield conn
-        finally:
-            conn.close()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """This thread's connection inside a write transaction, committed on success
+
+        BEGIN IMMEDIATE takes the write lock up front, so checks made inside
+        the block still hold when its writes land.
+        """
+        with self.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.commit()
+
+    def _synced_occupancy(self, conn):
+        """The occupancy index, reloaded first if another connection committed since this thread last looked"""
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._local, 'data_version', None) != version:
+            if self.occupancy.load(conn, int(time.time())):
+                self._local.data_version = version  # Otherwise retried on the next lookup
+        return self.occupancy
+
+    def close(self):
+        """Write queued denial incidents and close the connections of all threads"""
+        self.denials.close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
 
     def init_database(self):
         """Initialize database tables"""
@@ -45,102 +334,283 @@ class DatabaseManager:
                 )
             ''')
             conn.commit()
+            self.migrate(conn)
+
+    def migrate(self, conn):
+        """Apply pending MIGRATIONS, each in its own write transaction"""
+        while True:
+            conn.execute('BEGIN IMMEDIATE')  # Another process may be migrating too
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                return
+            MIGRATIONS[version](conn)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.commit()
+            print(f"[DATABASE] Applied migration {version + 1}: {MIGRATIONS[version].__doc__}")
 
     def has_recent_denial(self, plate, reason, minutes=5):
         """Check if a denial incident for the plate and reason exists within the last `minutes`"""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
+        now = int(time.time())
+        if minutes >= DENIAL_COOLDOWN_MINUTES and self.denials.recent(plate, reason, now):
+            return True  # Logged by this process, possibly still queued
+        cutoff_time = now - minutes * 60
         with self.get_connection() as conn:
             cursor = conn.execute(
                 '''SELECT id FROM denial_incidents 
-                   WHERE plate = ? AND reason = ? 
-                   AND datetime(denial_time) > datetime(?)''',
-                (plate, reason, cutoff_time.strftime('%Y-%m-%d %H:%M:%S'))
+                   WHERE plate = ? AND reason = ? AND denial_time > ?
+                   LIMIT 1''',
+                (plate, reason, cutoff_time)
             )
             return cursor.fetchone() is not None
 
     def add_denial_incident(self, plate, reason):
-        """Add a denial incident to the database if no similar incident exists within cooldown"""
-        if self.has_recent_denial(plate, reason):
+        """Queue a denial incident unless the same one was logged within the cooldown; True if queued
+
+        The incident is written by a background thread; call
+        `self.denials.flush()` to wait for it.
+        """
+        return self.denials.log(plate, reason, int(time.time()))
+
+    def _insert_denial(self, conn, plate, reason, now, cooldown):
+        """Insert a denial unless the same one is in the table within `cooldown` seconds; returns its id or None"""
+        recent = conn.execute(
+            'SELECT id FROM denial_incidents WHERE plate = ? AND reason = ? AND denial_time > ? LIMIT 1',
+            (plate, reason, now - cooldown)
+        ).fetchone()
+        if recent:
             return None  # Cooldown active, do not log
+        denial_id = conn.execute(
+            'INSERT INTO denial_incidents (plate, denial_time, reason) VALUES (?, ?, ?)',
+            (plate, now, reason)
+        ).lastrowid
+        bump_stats(conn, now, denials=1)
+        return denial_id
+
+    def admit_entry(self, plate, cooldown=0):
+        """Decide on and record an entry in one transaction
+
+        Denied if the plate has an unpaid record, or entered less than
+        `cooldown` seconds ago; the denial is queued for the incident log
+        after the transaction. Otherwise the entry is inserted. Returns a
+        Decision.
+        """
+        now = int(time.time())
+        reason = None
+        with self.transaction() as conn:
+            occupancy = self._synced_occupancy(conn)
+            unpaid = occupancy.unpaid(plate)
+            if unpaid:
+                reason = "Unpaid parking record"
+                record_id = unpaid['id']
+            elif cooldown:
+                if occupancy.covers(cooldown):
+                    recent = occupancy.entered_since(plate, now - cooldown)
+                else:
+                    recent = conn.execute(
+                        'SELECT id FROM parking_records WHERE car_plate = ? AND entry_time > ? LIMIT 1',
+                        (plate, now - cooldown)
+                    ).fetchone() is not None
+                if recent:
+                    reason = "Cooldown period active"
+                    record_id = None
+
+            if not reason:
+                record = self._insert_entry(conn, plate, now)
+        if reason:
+            return Decision(False, reason, record_id, self.denials.log(plate, reason, now))
+        self.occupancy.add_entry(record)
+        return Decision(True, None, record['id'], False)
+
+    def authorize_exit(self, plate, window=5):
+        """Decide on an exit: allowed after a paid exit within `window` minutes
+
+        A denial is queued for the incident log. Returns a Decision.
+        """
+        now = int(time.time())
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                'INSERT INTO denial_incidents (plate, denial_time, reason) VALUES (?, ?, ?)',
-                (plate, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), reason)
-            )
-            conn.commit()
-            return cursor.lastrowid
+            if self._paid_exit_since(conn, plate, now - window * 60):
+                return Decision(True, None, None, False)
+        reason = "No valid payment"
+        return Decision(False, reason, None, self.denials.log(plate, reason, now))
+
+    def _paid_exit_since(self, conn, plate, cutoff):
+        occupancy = self._synced_occupancy(conn)
+        if occupancy.covers(int(time.time()) - cutoff):
+            return occupancy.paid_exit_since(plate, cutoff)
+        return conn.execute(
+            'SELECT id FROM parking_records WHERE car_plate = ? AND payment_status = 1 AND exit_time > ? LIMIT 1',
+            (plate, cutoff)
+        ).fetchone() is not None
+
+    def _insert_entry(self, conn, plate, now):
+        record_id = conn.execute(
+            'INSERT INTO parking_records (entry_time, car_plate) VALUES (?, ?)',
+            (now, plate)
+        ).lastrowid
+        bump_stats(conn, now, entries=1)
+        return {'id': record_id, 'entry_time': now, 'exit_time': None, 'car_plate': plate,
+                'due_payment': 0, 'payment_status': 0, 'created_at': None}
 
     def add_entry(self, plate):
         """Add new parking entry"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(
-                'INSERT INTO parking_records (entry_time, car_plate) VALUES (?, ?)',
-                (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), plate)
-            )
-            conn.commit()
-            return cursor.lastrowid
+        with self.transaction() as conn:
+            record = self._insert_entry(conn, plate, int(time.time()))
+        self.occupancy.add_entry(record)
+        return record['id']
 
     def has_unpaid_record(self, plate):
         """Check if plate has unpaid parking record"""
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                'SELECT id FROM parking_records WHERE car_plate = ? AND payment_status = 0',
-                (plate,)
-            )
-            return cursor.fetchone() is not None
+            return self._synced_occupancy(conn).unpaid(plate) is not None
 
     def get_unpaid_record(self, plate):
-        """Get unpaid record for a plate"""
+        """Get the latest unpaid record for a plate, as a dict"""
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                '''SELECT * FROM parking_records 
-                   WHERE car_plate = ? AND payment_status = 0 
-                   ORDER BY entry_time DESC LIMIT 1''',
-                (plate,)
-            )
-            return cursor.fetchone()
+            return self._synced_occupancy(conn).unpaid(plate)
 
     def update_exit_and_payment(self, plate, amount_due):
         """Update exit time and payment amount"""
-        exit_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with self.get_connection() as conn:
+        exit_time = int(time.time())
+        with self.transaction() as conn:
+            records = conn.execute(
+                'SELECT id, entry_time, exit_time FROM parking_records WHERE car_plate = ? AND payment_status = 0',
+                (plate,)
+            ).fetchall()
+            for record in records:
+                if record['exit_time'] is None:
+                    bump_stats(conn, record['entry_time'], duration_sum=exit_time - record['entry_time'], durations=1)
+                else:
+                    # A repeated exit moves the exit, it does not add one
+                    bump_stats(conn, record['entry_time'], duration_sum=exit_time - record['exit_time'])
+                    bump_stats(conn, record['exit_time'], exits=-1)
+                bump_stats(conn, exit_time, exits=1)
             conn.execute(
                 '''UPDATE parking_records 
                    SET exit_time = ?, due_payment = ?
                    WHERE car_plate = ? AND payment_status = 0''',
                 (exit_time, amount_due, plate)
             )
-            conn.commit()
+        self.occupancy.set_exit(plate, [record['id'] for record in records], exit_time, amount_due)
 
     def mark_as_paid(self, plate):
         """Mark record as paid"""
-        with self.get_connection() as conn:
+        with self.transaction() as conn:
+            records = conn.execute(
+                'SELECT id, entry_time, due_payment FROM parking_records WHERE car_plate = ? AND payment_status = 0',
+                (plate,)
+            ).fetchall()
+            for record in records:
+                bump_stats(conn, record['entry_time'], revenue=record['due_payment'] or 0)
             conn.execute(
                 '''UPDATE parking_records 
                    SET payment_status = 1
                    WHERE car_plate = ? AND payment_status = 0''',
                 (plate,)
             )
-            conn.commit()
+        self.occupancy.mark_paid(plate, [record['id'] for record in records])
+
+    def rebuild_stats(self):
+        """Recompute the hourly and daily rollups from the full history"""
+        with self.transaction() as conn:
+            rebuild_stats(conn)
 
     def has_recent_paid_exit(self, plate, minutes=5):
         """Check if plate has recent paid exit within specified minutes"""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                '''SELECT * FROM parking_records 
-                   WHERE car_plate = ? AND payment_status = 1 
-                   AND exit_time IS NOT NULL 
-                   AND datetime(exit_time) > datetime(?)
-                   ORDER BY exit_time DESC LIMIT 1''',
-                (plate, cutoff_time.strftime('%Y-%m-%d %H:%M:%S'))
-            )
-            return cursor.fetchone() is not None
+            return self._paid_exit_since(conn, plate, int(time.time()) - minutes * 60)
 
-    def get_all_records(self):
+    def get_all_records(self, include_archived=False):
         """Get all parking records"""
         with self.get_connection() as conn:
             cursor = conn.execute(
-                'SELECT * FROM parking_records ORDER BY entry_time DESC'
+                f'SELECT * FROM {records_table(include_archived)} ORDER BY entry_time DESC'
             )
-            return cursor.fetchall()
\ No newline at end of file
+            return cursor.fetchall()
+
+    def archive_closed_sessions(self, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=5000):
+        """Move paid sessions that exited more than `older_than_days` ago to the archive table
+
+        Runs in batches of `batch_size` rows, each its own transaction, so
+        lanes are never kept waiting for long. Returns the number moved.
+        """
+        cutoff = int(time.time()) - older_than_days * 86400
+        moved = 0
+        while True:
+            with self.transaction() as conn:
+                ids = [row[0] for row in conn.execute(
+                    '''SELECT id FROM parking_records
+                       WHERE payment_status = 1 AND exit_time < ?
+                       ORDER BY exit_time LIMIT ?''',
+                    (cutoff, batch_size)
+                )]
+                if not ids:
+                    break
+                placeholders = ','.join('?' * len(ids))
+                conn.execute(f'INSERT INTO archived_parking_records SELECT * FROM parking_records '
+                             f'WHERE id IN ({placeholders})', ids)
+                conn.execute(f'DELETE FROM parking_records WHERE id IN ({placeholders})', ids)
+            moved += len(ids)
+        return moved
+
+    def get_daily_stats(self, day=None):
+        """Entries, revenue and average stay (minutes) of a day, plus cars currently parked
+
+        Read from the daily rollup, so the cost does not grow with the table.
+        """
+        with self.get_connection() as conn:
+            row = conn.execute(
+                'SELECT entries, revenue, duration_sum, durations FROM daily_stats WHERE period = ?',
+                (day or time.strftime('%Y-%m-%d'),)
+            ).fetchone()
+            currently_parked = self._synced_occupancy(conn).occupancy()
+        if row is None:
+            total, revenue, avg_duration = 0, 0, 0
+        else:
+            total, revenue = row['entries'], row['revenue']
+            avg_duration = row['duration_sum'] / row['durations'] / 60.0 if row['durations'] else 0
+        return {
+            'total_today': total,
+            'currently_parked': currently_parked,
+            'revenue_today': float(revenue),
+            'avg_duration': round(avg_duration, 1)
+        }
+
+    def get_hourly_stats(self, day=None):
+        """Entries and paid revenue per hour ('00'-'23') of a day, from the hourly rollup"""
+        day = day or time.strftime('%Y-%m-%d')
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                '''SELECT period, entries, revenue FROM hourly_stats
+                   WHERE period BETWEEN ? AND ? AND entries > 0
+                   ORDER BY period''',
+                (f'{day} 00', f'{day} 23')
+            ).fetchall()
+        return [{'hour': row['period'][-2:], 'entries': row['entries'], 'revenue': row['revenue']} for row in rows]
+
+    def get_records(self, limit=20, offset=0, include_archived=False):
+        """Parking records, newest entry first"""
+        with self.get_connection() as conn:
+            return conn.execute(
+                f'SELECT * FROM {records_table(include_archived)} ORDER BY entry_time DESC LIMIT ? OFFSET ?',
+                (limit, offset)
+            ).fetchall()
+
+    def count_records(self, include_archived=False):
+        with self.get_connection() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM {records_table(include_archived)}').fetchone()[0]
+
+    def search_records(self, plate=None, day=None, limit=50, include_archived=False):
+        """Records whose plate contains `plate` and/or that entered on `day` ('YYYY-MM-DD')"""
+        query = f'SELECT * FROM {records_table(include_archived)} WHERE 1=1'
+        params = []
+        if plate:
+            query += ' AND car_plate LIKE ?'
+            params.append(f'%{plate}%')
+        if day:
+            query += ' AND entry_time >= ? AND entry_time < ?'
+            params.extend(day_range(day))
+        query += ' ORDER BY entry_time DESC LIMIT ?'
+        params.append(limit)
+        with self.get_connection() as conn:
+            return conn.execute(query, params).fetchall()
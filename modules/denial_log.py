@@ -0,0 +1,94 @@
+# modules/denial_log.py
+import queue
+import threading
+
+
+class DenialLog:
+    """Denial incidents with an in-memory cooldown and a background writer
+
+    `log` checks a TTL map keyed by (plate, reason) and, outside the
+    cooldown, queues the incident; it never touches the database. A writer
+    thread inserts queued incidents in batches, one transaction per batch,
+    re-checking the cooldown in SQL so denials logged by other processes
+    are not duplicated.
+    """
+
+    def __init__(self, db, cooldown=300, batch_size=100):
+        self.db = db
+        self.cooldown = cooldown  # Seconds before the same plate and reason is logged again
+        self.batch_size = batch_size
+        self.logged = {}  # (plate, reason) -> denial time of the last logged incident
+        self.written = 0
+        self.skipped = 0  # Dropped by the SQL check, already logged by another process
+        self._queue = queue.Queue()
+        self._pruned_at = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def log(self, plate, reason, now):
+        """Queue an incident unless one was logged within the cooldown; True if queued"""
+        key = (plate, reason)
+        with self._lock:
+            if now - self.logged.get(key, now - self.cooldown) < self.cooldown:
+                return False
+            self.logged[key] = now
+            if now - self._pruned_at >= self.cooldown:
+                self._prune(now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='denial-writer', daemon=True)
+                self._thread.start()
+        self._queue.put((plate, reason, now))
+        return True
+
+    def recent(self, plate, reason, now):
+        """True if this process logged the incident within the cooldown"""
+        with self._lock:
+            return now - self.logged.get((plate, reason), now - self.cooldown) < self.cooldown
+
+    def _prune(self, now):
+        self._pruned_at = now
+        self.logged = {key: logged for key, logged in self.logged.items() if now - logged < self.cooldown}
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"[DATABASE] Failed to log {len(batch)} denial incidents: {e}")
+                with self._lock:
+                    for plate, reason, denied_at in batch:
+                        if self.logged.get((plate, reason)) == denied_at:
+                            del self.logged[(plate, reason)]
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        with self.db.transaction() as conn:
+            for plate, reason, now in batch:
+                if self.db._insert_denial(conn, plate, reason, now, self.cooldown) is None:
+                    self.skipped += 1
+                else:
+                    self.written += 1
+
+    def flush(self):
+        """Block until every queued incident is written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
@@ -2,15 +2,55 @@
 import serial
 import serial.tools.list_ports
 import platform
+import threading
 import time
+from modules.presence_filter import PresenceFilter
 
 
 class GateController:
-    def __init__(self, baud_rate=9600, timeout=1):
+    """Gate Arduino: gate/buzzer commands and the ultrasonic distance stream
+
+    A background thread reads every line the Arduino sends. Distance
+    samples feed a PresenceFilter; any other line goes to the callbacks
+    registered with `subscribe`. `read_distance` and `vehicle_present`
+    only return the latest filtered values and never touch the port.
+
+    If the board is missing at startup or drops later, the same thread
+    (re)connects with exponential backoff, trying the last good port before
+    rescanning. The last gate command sent during the outage is replayed on
+    reconnect.
+    """
+
+    def __init__(self, baud_rate=9600, timeout=1, port=None, reset_delay=2.0, max_backoff=2.0):
         self.arduino = None
+        self.port = port  # None to auto-detect
         self.baud_rate = baud_rate
         self.timeout = timeout
-        self.connect()
+        self.reset_delay = reset_delay  # Longest wait for the board's first line after opening
+        self.max_backoff = max_backoff
+
+        # Connection supervision
+        self.connected = False
+        self.last_port = None  # Last port a board answered on
+        self.reconnects = 0
+        self._pending_command = None  # Gate command to replay after an outage
+        self._write_lock = threading.Lock()
+
+        # Serial reader
+        self.presence = PresenceFilter()
+        self.subscribers = []
+        self._reader = None
+        self._reader_stop = threading.Event()
+
+        # Scheduled gate state
+        self.gate_state = 'closed'
+        self._close_deadline = None
+        self._close_timer = None
+        self._gate_lock = threading.Lock()
+
+        if not self.connect():
+            print("[GATE] Arduino offline, retrying in the background")
+        self._start_reader()  # Also connects later if the board is not there yet
 
     def detect_arduino_port(self):
         """Auto-detect Arduino serial port"""
@@ -24,53 +64,251 @@ class GateController:
                 return dev
         return None
 
-    def connect(self):
+    def _candidate_ports(self):
+        """Configured port, else the last good port followed by a fresh scan"""
+        if self.port:
+            return [self.port]
+        ports = [self.last_port] if self.last_port else []
+        detected = self.detect_arduino_port()
+        if detected and detected not in ports:
+            ports.append(detected)
+        return ports
+
+    def connect(self, quiet=False):
         """Connect to Arduino"""
-        port = self.detect_arduino_port()
-        if not port:
-            print("[ERROR] Arduino not detected.")
+        ports = self._candidate_ports()
+        if not ports:
+            if not quiet:
+                print("[ERROR] Arduino not detected.")
             return False
 
-        try:
-            self.arduino = serial.Serial(port, self.baud_rate, timeout=self.timeout)
-            time.sleep(2)  # Wait for Arduino to reset
+        for port in ports:
+            try:
+                conn = serial.Serial(port, self.baud_rate, timeout=self.timeout)
+            except serial.SerialException as e:
+                if not quiet:
+                    print(f"[ERROR] Failed to connect to Arduino: {e}")
+                continue
+
+            first_line = self._wait_until_ready(conn)
+            with self._write_lock:
+                self.arduino = conn
+                self.connected = True
+                self.last_port = port
+                if not self._flush_pending_locked():
+                    continue  # Board dropped during the reset wait; the command stays queued
             print(f"[GATE] Connected to Arduino on {port}")
+            if first_line:
+                self._dispatch(first_line)
             return True
-        except serial.SerialException as e:
-            print(f"[ERROR] Failed to connect to Arduino: {e}")
-            return False
+        return False
 
-    def read_distance(self):
-        """Read distance from ultrasonic sensor"""
-        if not self.arduino or self.arduino.in_waiting == 0:
-            return None
+    def _wait_until_ready(self, conn):
+        """Wait for the board's first line (it is ready) or at most `reset_delay`"""
+        deadline = time.monotonic() + self.reset_delay
         try:
-            val = self.arduino.readline().decode('utf-8').strip()
-            return float(val)
-        except (UnicodeDecodeError, ValueError):
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                conn.timeout = remaining
+                raw = conn.readline()
+                if raw.endswith(b'\n'):
+                    return raw.decode('utf-8', errors='replace').strip()
+        except (serial.SerialException, OSError):
             return None
+        finally:
+            conn.timeout = self.timeout
+
+    def _start_reader(self):
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._read_loop, name='gate-serial-reader', daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        """Parse every incoming line until stopped, reconnecting when the board drops"""
+        backoff = 0.05
+        while not self._reader_stop.is_set():
+            if not self.connected:
+                if self.connect(quiet=True):
+                    self.reconnects += 1
+                    backoff = 0.05
+                else:
+                    self._reader_stop.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            try:
+                raw = self.arduino.readline()  # Blocks for at most `timeout` seconds
+            except (serial.SerialException, OSError, TypeError) as e:
+                if self._reader_stop.is_set():
+                    return
+                print(f"[ERROR] Arduino connection lost: {e}; reconnecting")
+                self._disconnect()
+                continue
+            if raw:
+                self._dispatch(raw.decode('utf-8', errors='replace').strip())
+
+    def _disconnect(self):
+        with self._write_lock:
+            self._close_port_locked()
+
+    def _close_port_locked(self):
+        """Mark the link down and release the port, so a reconnect does not leak the old handle"""
+        self.connected = False
+        try:
+            self.arduino.close()
+        except (serial.SerialException, OSError):
+            pass
+
+    def _send(self, command, replay=True):
+        """Write a command; gate commands sent while disconnected are replayed on reconnect"""
+        with self._write_lock:
+            if self.connected:
+                try:
+                    self.arduino.write(command)
+                    return True
+                except (serial.SerialException, OSError) as e:
+                    print(f"[ERROR] Arduino write failed: {e}")
+                    self._close_port_locked()
+            if replay:
+                self._pending_command = command  # Only the latest gate state matters
+                print(f"[GATE] Arduino offline, command {command!r} queued")
+            return False
+
+    def _flush_pending_locked(self):
+        """Replay the queued command; on a write error the link is marked down and the command kept"""
+        if self._pending_command is None:
+            return True
+        try:
+            self.arduino.write(self._pending_command)
+        except (serial.SerialException, OSError) as e:
+            print(f"[ERROR] Arduino write failed: {e}")
+            self._close_port_locked()
+            return False
+        self._pending_command = None
+        return True
+
+    def _dispatch(self, line):
+        """Route one line: distances to the presence filter, the rest to subscribers"""
+        if not line:
+            return
+        try:
+            distance = float(line)
+        except ValueError:
+            for callback in list(self.subscribers):
+                try:
+                    callback(line)
+                except Exception as e:
+                    print(f"[ERROR] Gate message handler failed on '{line}': {e}")
+            return
+        self.presence.add(distance)
+
+    def write(self, data):
+        """Send raw bytes (e.g. payment replies) under the write lock; False if the board is offline
+
+        Unlike gate commands, these are not replayed after a reconnect.
+        """
+        return self._send(data, replay=False)
+
+    def subscribe(self, callback):
+        """Call `callback(line)` for every non-distance line from the Arduino"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def set_presence_range(self, min_distance, max_distance, hysteresis=None):
+        """Distance range (cm) in which a vehicle counts as present"""
+        self.presence.set_range(min_distance, max_distance, hysteresis)
+
+    def read_distance(self):
+        """Latest median-filtered distance in cm, None without recent samples"""
+        return self.presence.latest()
+
+    def vehicle_present(self):
+        """Filtered, hysteresis-protected vehicle presence"""
+        return self.presence.is_present()
 
     def open_gate(self, duration=15):
-        """Open gate for specified duration"""
-        if self.arduino:
-            self.arduino.write(b'1')
-            print(f"[GATE] Opening gate for {duration} seconds")
-            time.sleep(duration)
-            self.arduino.write(b'0')
-            print("[GATE] Gate closed")
+        """Open gate for specified duration; while offline the commands are queued for reconnect"""
+        self._send(b'1')
+        print(f"[GATE] Opening gate for {duration} seconds")
+        time.sleep(duration)
+        self._send(b'0')
+        print("[GATE] Gate closed")
+        return True
+
+    def schedule_open(self, duration=15):
+        """Open gate without blocking; it closes itself after `duration` seconds.
+
+        Opening an already open gate extends the running open instead of
+        re-sending the command. While the Arduino is offline the command is
+        queued and sent on reconnect, unless the gate has closed by then.
+        """
+        with self._gate_lock:
+            deadline = time.monotonic() + duration
+            if self.gate_state == 'open':
+                if deadline <= self._close_deadline:
+                    return True
+                self._close_timer.cancel()
+                print(f"[GATE] Extending open gate by {duration} seconds")
+            else:
+                self._send(b'1')
+                self.gate_state = 'open'
+                print(f"[GATE] Opening gate for {duration} seconds")
+
+            self._close_deadline = deadline
+            self._close_timer = threading.Timer(duration, self._close_when_due, args=(deadline,))
+            self._close_timer.daemon = True
+            self._close_timer.start()
             return True
-        return False
+
+    def _close_when_due(self, deadline):
+        """Timer callback; ignored if the open was extended meanwhile"""
+        with self._gate_lock:
+            if self.gate_state != 'open' or self._close_deadline != deadline:
+                return
+            self._close_gate_locked()
+
+    def close_gate(self):
+        """Close gate immediately and cancel any scheduled close"""
+        with self._gate_lock:
+            if self._close_timer:
+                self._close_timer.cancel()
+            return self._close_gate_locked()
+
+    def _close_gate_locked(self):
+        self._close_timer = None
+        self._close_deadline = None
+        self._send(b'0')  # Also replaces a queued open that was never sent
+        self.gate_state = 'closed'
+        print("[GATE] Gate closed")
+        return True
+
+    def get_gate_state(self):
+        """Current gate state and seconds until the scheduled close"""
+        with self._gate_lock:
+            closes_in = None
+            if self.gate_state == 'open':
+                closes_in = max(0.0, self._close_deadline - time.monotonic())
+            return {'state': self.gate_state, 'closes_in': closes_in}
 
     def trigger_alert(self):
         """Trigger buzzer/alert"""
-        if self.arduino:
-            self.arduino.write(b'2')
+        if self._send(b'2', replay=False):  # A late alert is worse than none
             print("[GATE] Alert triggered")
             return True
         return False
 
     def close(self):
         """Close Arduino connection"""
+        if self.gate_state == 'open':
+            self.close_gate()
+        self._reader_stop.set()
+        if self._reader:
+            self._reader.join(timeout=self.timeout + self.reset_delay)
         if self.arduino:
             self.arduino.close()
             print("[GATE] Connection closed")
@@ -0,0 +1,146 @@
+import cv2
+import time
+from modules.gate_control import GateController
+from modules.database_utils import DatabaseManager
+from modules.logger import ParkingLogger
+from modules.image_manager import ImageManager
+from modules.ocr_utilis import PlateRecognizer
+from modules.pipeline import RecognitionPipeline
+
+MODEL_PATH = 'models/runs/detect/train/weights/best.pt'
+
+
+class LaneSystem:
+    """Camera, gate and recognition plumbing shared by the entry and exit lanes
+
+    Subclasses set `role` ('entry' or 'exit'), which names the window,
+    pipeline, log lines and default preview lane, and implement `_decide`
+    for a consensus plate.
+    """
+
+    role = None
+
+    def __init__(self, plate_recognizer=None, camera=0, port=None, lane=None, headless=False, preview=None,
+                 db=None, **recognizer_options):
+        # A shared recognizer and database are passed in when several lanes run in one process
+        self.plate_recognizer = plate_recognizer or PlateRecognizer(MODEL_PATH, **recognizer_options)
+        self.lane = lane
+        self.headless = headless  # No HighGUI windows; previews only through `preview`
+        self.preview = preview  # Optional PreviewPublisher serving the dashboard
+        self.gate_controller = GateController(port=port)
+        self.owns_db = db is None
+        self.db = db or DatabaseManager()
+        self.logger = ParkingLogger()
+        self.image_manager = ImageManager()
+
+        # Configuration
+        self.max_distance = 50  # cm
+        self.min_distance = 0  # cm
+        self.gate_open_time = 15  # seconds
+        self.gate_controller.set_presence_range(self.min_distance, self.max_distance)
+
+        # Initialize camera
+        self.cap = cv2.VideoCapture(camera)
+        if not self.cap.isOpened():
+            self.logger.log_error("Cannot open camera")
+            raise Exception("Camera initialization failed")
+
+        self.last_preview = None
+        self.pipeline = None  # Built by run(); a multi-lane process drives the lane through its own pipeline
+
+    def _decide(self, plate, plate_data, frame):
+        """Act on a consensus plate (open the gate or deny)"""
+        raise NotImplementedError
+
+    def _build_pipeline(self):
+        return RecognitionPipeline(
+            self.cap,
+            infer=self._process_frame,
+            decide=self._decide,
+            should_infer=self._vehicle_present,
+            logger=self.logger,
+            extra_stats=self.plate_recognizer.stats,
+            name=f'{self.role.upper()} PIPELINE'
+        )
+
+    def run(self):
+        """Main lane loop"""
+        self.logger.log_info(f"{self.role.capitalize()} system started")
+        print(f"[{self.role.upper()} SYSTEM] Ready. Press 'q' to exit.")
+
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        try:
+            while self.pipeline.is_running():
+                frame = self.pipeline.latest_frame()
+                preview = self.last_preview
+                self._publish_preview(frame, preview)
+
+                self.pipeline.report_if_due()
+
+                if self.headless:
+                    time.sleep(0.05)
+                elif not self._show_windows(frame, preview):
+                    break
+
+        except KeyboardInterrupt:
+            self.logger.log_info(f"{self.role.capitalize()} system stopped by user")
+        finally:
+            self._cleanup()
+
+    def _show_windows(self, frame, preview):
+        """Display feed and preview windows; returns False when 'q' is pressed"""
+        if frame is not None:
+            cv2.imshow(f'{self.role.capitalize()} System', frame)
+
+        if preview is not None:
+            cv2.imshow('Detected Plate', preview['image'])
+            if preview['processed'] is not None:
+                cv2.imshow('Processed', preview['processed'])
+
+        return cv2.waitKey(1) & 0xFF != ord('q')
+
+    def _publish_preview(self, frame, preview):
+        """Hand the latest images to the preview server"""
+        if self.preview and frame is not None:
+            self.preview.publish(self.lane or self.role, frame, preview)
+        # Processed crops are only copied out of the reused buffers when someone can see them
+        self.plate_recognizer.keep_previews = not self.headless or bool(self.preview and self.preview.is_watched())
+
+    def _vehicle_present(self):
+        """Filtered distance sensor state, kept up to date by the gate's serial reader"""
+        return self.gate_controller.vehicle_present()
+
+    def _process_frame(self, frame):
+        """Process frame for license plate detection and return consensus decisions"""
+        detected_plates, results = self.plate_recognizer.detect_plates(frame, self.lane)
+        return self._collect_decisions(detected_plates)
+
+    def _collect_decisions(self, detected_plates):
+        """Vote on detected plates and return (consensus_plate, plate_data) pairs"""
+        decisions = []
+
+        for plate_data in detected_plates:
+            plate = plate_data['plate']
+            consensus_plate = self.plate_recognizer.get_consensus_plate(
+                plate, plate_data['track_id'], plate_data['weight'], self.lane
+            )
+
+            if consensus_plate:
+                decisions.append((consensus_plate, plate_data))
+
+            self.last_preview = plate_data
+
+        return decisions
+
+    def _cleanup(self):
+        """Clean up resources"""
+        if self.pipeline:
+            self.pipeline.stop()
+        self.cap.release()
+        self.gate_controller.close()
+        if self.owns_db:
+            self.db.close()  # Writes queued denial incidents
+        if not self.headless:
+            cv2.destroyAllWindows()
+        self.logger.log_info(f"{self.role.capitalize()} system cleaned up")
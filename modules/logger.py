@@ -31,10 +31,13 @@ class ParkingLogger:
         status = "SUCCESS" if success else "DENIED"
         self.logger.info(f"EXIT - Plate: {plate}, Status: {status}")
 
-    def log_payment(self, plate, amount, success=True):
-        """Log payment transaction"""
+    def log_payment(self, plate, amount, success=True, latency=None):
+        """Log payment transaction, with card-tap-to-balance-written latency in seconds"""
         status = "SUCCESS" if success else "FAILED"
-        self.logger.info(f"PAYMENT - Plate: {plate}, Amount: {amount}, Status: {status}")
+        message = f"PAYMENT - Plate: {plate}, Amount: {amount}, Status: {status}"
+        if latency is not None:
+            message += f", Latency: {latency * 1000:.0f} ms"
+        self.logger.info(message)
 
     def log_error(self, message):
         """Log error message"""
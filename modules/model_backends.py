@@ -0,0 +1,170 @@
+# modules/model_backends.py
+import glob
+import os
+import shutil
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from modules.plate_tracker import box_iou
+from modules.thread_limits import limit_threads_env
+
+BACKENDS = ('pytorch', 'onnx', 'openvino')
+VERIFY_IMAGE_GLOB = 'images/*/*_full_*.jpg'
+
+
+def exported_model_path(model_path, backend, imgsz):
+    """Where the cached export of `model_path` for a backend and input size lives
+
+    Exports have a dynamic batch dimension (multi-lane mode detects several
+    frames per call), which is part of the name so older fixed-batch
+    exports are not reused.
+    """
+    base = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        return f"{base}_{imgsz}_dynamic.onnx"
+    if backend == 'openvino':
+        # Ultralytics recognises OpenVINO models by the `_openvino_model` suffix
+        return f"{base}_{imgsz}_dynamic_openvino_model"
+    raise ValueError(f"Backend {backend} has no export format")
+
+
+def export_model(model_path, backend, imgsz=640):
+    """Export the PyTorch model once and reuse the artifact on later starts"""
+    target = exported_model_path(model_path, backend, imgsz)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path):
+        return target
+
+    print(f"[MODEL] Exporting {model_path} to {backend} (imgsz={imgsz})")
+    exported = YOLO(model_path).export(format=backend, imgsz=imgsz, dynamic=True)
+    if os.path.exists(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        else:
+            os.remove(target)
+    os.rename(exported, target)
+    return target
+
+
+def set_thread_count(threads):
+    """Limit the CPU threads used by torch and OpenCV; warns about any limit that did not apply
+
+    OpenMP/MKL environment limits only work before torch is imported, see
+    modules/thread_limits.py.
+    """
+    import torch
+    limit_threads_env(threads)
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    applied = torch.get_num_threads()
+    if applied != threads:
+        print(f"[WARNING] torch is using {applied} threads, not the requested {threads}")
+        return False
+    return True
+
+
+def _apply_runtime_threads(model, backend, path, threads):
+    """Rebuild the exported model's runtime session with a fixed thread count
+
+    Ultralytics has no public option for this, so the session is swapped
+    on its backend object and the result is read back. Returns True if
+    the runtime reports `threads`; otherwise warns and returns False.
+    """
+    backend_model = model.predictor.model if model.predictor else None
+    try:
+        if backend == 'onnx':
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            providers = backend_model.session.get_providers()
+            backend_model.session = ort.InferenceSession(path, options, providers=providers)
+            applied = backend_model.session.get_session_options().intra_op_num_threads
+        elif backend == 'openvino':
+            import openvino as ov
+            core = ov.Core()
+            xml = glob.glob(os.path.join(path, '*.xml'))[0]
+            backend_model.ov_compiled_model = core.compile_model(
+                core.read_model(xml), 'CPU', {'INFERENCE_NUM_THREADS': threads}
+            )
+            applied = backend_model.ov_compiled_model.get_property('INFERENCE_NUM_THREADS')
+        else:
+            return True
+    except Exception as e:
+        print(f"[WARNING] --threads {threads} not applied to the {backend} runtime: {e}")
+        return False
+    if int(applied) != threads:
+        print(f"[WARNING] {backend} runtime is using {applied} threads, not the requested {threads}")
+        return False
+    print(f"[MODEL] {backend} runtime limited to {threads} threads")
+    return True
+
+
+def load_detector(model_path, backend='pytorch', imgsz=640, threads=None):
+    """Load the plate detector for the given backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Use one of {', '.join(BACKENDS)}")
+    if threads:
+        set_thread_count(threads)
+
+    if backend == 'pytorch':
+        return YOLO(model_path)
+
+    path = export_model(model_path, backend, imgsz)
+    model = YOLO(path, task='detect')
+    if threads:
+        # The runtime session is created lazily on the first prediction
+        model(sample_frame(imgsz), imgsz=imgsz, verbose=False)
+        _apply_runtime_threads(model, backend, path, threads)
+    return model
+
+
+def sample_frame(imgsz):
+    return np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+
+
+def load_verify_frames(pattern=VERIFY_IMAGE_GLOB, limit=5):
+    """Saved full frames used to compare backends"""
+    frames = []
+    for path in sorted(glob.glob(pattern))[:limit]:
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def _detections(model, frame, imgsz):
+    boxes = model(frame, imgsz=imgsz, verbose=False)[0].boxes
+    return [(tuple(map(float, box.xyxy[0])), float(box.conf[0])) for box in boxes]
+
+
+def verify_detector(reference, candidate, frames, imgsz=640, iou_tolerance=0.9, conf_tolerance=0.05):
+    """Check that `candidate` finds the same boxes as `reference` within tolerance
+
+    Also runs a two-frame batch through `candidate`, as multi-lane mode
+    does. Returns (ok, message).
+    """
+    for index, frame in enumerate(frames):
+        expected = _detections(reference, frame, imgsz)
+        actual = _detections(candidate, frame, imgsz)
+        if len(expected) != len(actual):
+            return False, f"frame {index}: {len(actual)} boxes, expected {len(expected)}"
+
+        for ref_box, ref_conf in expected:
+            best = max(actual, key=lambda det: box_iou(ref_box, det[0]))
+            iou = box_iou(ref_box, best[0])
+            if iou < iou_tolerance:
+                return False, f"frame {index}: box IoU {iou:.3f} below {iou_tolerance}"
+            if abs(ref_conf - best[1]) > conf_tolerance:
+                return False, f"frame {index}: confidence {best[1]:.3f} vs {ref_conf:.3f}"
+
+    pair = (frames * 2)[:2]
+    try:
+        batch = candidate(pair, imgsz=imgsz, verbose=False)
+    except Exception as e:
+        return False, f"two-frame batch failed: {e}"
+    if len(batch) != len(pair):
+        return False, f"two-frame batch returned {len(batch)} results"
+    for index, (frame, results) in enumerate(zip(pair, batch)):
+        if len(results.boxes) != len(_detections(candidate, frame, imgsz)):
+            return False, f"two-frame batch: frame {index} differs from a single-frame call"
+
+    return True, f"{len(frames)} frames and a two-frame batch match"
@@ -0,0 +1,65 @@
+# modules/motion_gate.py
+import cv2
+
+
+class MotionGate:
+    """Cheap change detector deciding whether a frame is worth running YOLO on
+
+    The region of interest is downscaled, converted to gray and compared
+    with the ROI as it was the last time inference ran. Inference is
+    skipped while fewer than `change_ratio` of the pixels differ by more
+    than `pixel_threshold`, unless the caller still has pending work.
+    """
+
+    def __init__(self, roi=None, scale=0.25, pixel_threshold=25, change_ratio=0.02):
+        self.roi = roi  # (x1, y1, x2, y2) in frame pixels, None for the whole frame
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.change_ratio = change_ratio
+        self.reference = None
+
+        # Counters
+        self.frames = 0
+        self.inferences_run = 0
+        self.inferences_skipped = 0
+
+    def _thumbnail(self, frame):
+        if self.roi:
+            x1, y1, x2, y2 = self.roi
+            frame = frame[y1:y2, x1:x2]
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def changed_fraction(self, thumbnail):
+        """Fraction of ROI pixels that changed since the reference"""
+        if self.reference is None or self.reference.shape != thumbnail.shape:
+            return 1.0
+        diff = cv2.absdiff(thumbnail, self.reference)
+        return cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]) / float(diff.size)
+
+    def should_infer(self, frame, pending=False):
+        """Return True if YOLO should run on this frame"""
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+
+        if pending or self.changed_fraction(thumbnail) >= self.change_ratio:
+            self.reference = thumbnail
+            self.inferences_run += 1
+            return True
+
+        self.inferences_skipped += 1
+        return False
+
+    def reset(self):
+        self.reference = None
+
+    def stats(self):
+        """Inference counters for checking the CPU savings"""
+        return {
+            'frames': self.frames,
+            'inferences_run': self.inferences_run,
+            'inferences_skipped': self.inferences_skipped,
+            'skip_ratio': round(self.inferences_skipped / self.frames, 3) if self.frames else 0.0,
+        }
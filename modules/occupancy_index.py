@@ -0,0 +1,130 @@
+# modules/occupancy_index.py
+import threading
+
+
+class OccupancyIndex:
+    """In-memory view of open parking sessions and recent activity, keyed by plate
+
+    Holds every unpaid record plus, for the last `horizon` seconds, each
+    plate's latest entry and latest paid exit. DatabaseManager reloads it
+    from SQLite whenever another connection has committed (PRAGMA
+    data_version) and writes its own changes through, so admission checks
+    and the occupancy count are dictionary lookups.
+
+    Every write-through bumps `writes`. A reload whose database read
+    overlapped a write-through is discarded and read again, since its
+    snapshot may predate that commit and would otherwise overwrite it.
+    """
+
+    def __init__(self, horizon=3600):
+        self.horizon = horizon  # Seconds of entry/exit history kept for cooldown and exit-window checks
+        self.open_sessions = {}  # plate -> {record id: record dict}
+        self.last_entry = {}  # plate -> latest entry time within the horizon
+        self.last_paid_exit = {}  # plate -> latest paid exit time within the horizon
+        self.open_count = 0
+        self.reloads = 0
+        self.discarded_reloads = 0
+        self.writes = 0  # Write-throughs applied so far
+        self._lock = threading.Lock()
+
+    def load(self, conn, now, attempts=3):
+        """Rebuild from the database, as seen by `conn`; False if every attempt raced a write-through"""
+        for _ in range(attempts):
+            with self._lock:
+                writes = self.writes
+            snapshot = self._read(conn, now)
+            with self._lock:
+                if self.writes != writes:
+                    self.discarded_reloads += 1
+                    continue
+                self.open_sessions, self.last_entry, self.last_paid_exit = snapshot
+                self.open_count = sum(len(sessions) for sessions in self.open_sessions.values())
+                self.reloads += 1
+                return True
+        return False
+
+    def _read(self, conn, now):
+        """Open sessions and recent activity, read in one transaction so the three queries agree"""
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute('BEGIN')
+        try:
+            return self._query(conn, now - self.horizon)
+        finally:
+            if own_transaction:
+                conn.rollback()  # Read only
+
+    @staticmethod
+    def _query(conn, cutoff):
+        open_sessions = {}
+        for row in conn.execute('SELECT * FROM parking_records WHERE payment_status = 0'):
+            open_sessions.setdefault(row['car_plate'], {})[row['id']] = dict(row)
+        last_entry = dict(conn.execute(
+            'SELECT car_plate, MAX(entry_time) FROM parking_records WHERE entry_time > ? GROUP BY car_plate',
+            (cutoff,)
+        ).fetchall())
+        last_paid_exit = dict(conn.execute(
+            '''SELECT car_plate, MAX(exit_time) FROM parking_records
+               WHERE exit_time > ? AND payment_status = 1 GROUP BY car_plate''',
+            (cutoff,)
+        ).fetchall())
+        return open_sessions, last_entry, last_paid_exit
+
+    # Write-through, called after the matching transaction committed. Each
+    # names the records it changed, so write-throughs from several threads
+    # can land in any order.
+
+    def add_entry(self, record):
+        with self._lock:
+            self.writes += 1
+            plate = record['car_plate']
+            sessions = self.open_sessions.setdefault(plate, {})
+            if record['id'] not in sessions:
+                self.open_count += 1
+            sessions[record['id']] = record
+            self.last_entry[plate] = max(record['entry_time'], self.last_entry.get(plate, 0))
+
+    def set_exit(self, plate, record_ids, exit_time, due_payment):
+        with self._lock:
+            self.writes += 1
+            sessions = self.open_sessions.get(plate, {})
+            for record_id in record_ids:
+                if record_id in sessions:
+                    sessions[record_id]['exit_time'] = exit_time
+                    sessions[record_id]['due_payment'] = due_payment
+
+    def mark_paid(self, plate, record_ids):
+        with self._lock:
+            self.writes += 1
+            sessions = self.open_sessions.get(plate, {})
+            paid = [sessions.pop(record_id) for record_id in record_ids if record_id in sessions]
+            if not sessions:
+                self.open_sessions.pop(plate, None)
+            self.open_count -= len(paid)
+            exits = [record['exit_time'] for record in paid if record['exit_time'] is not None]
+            if exits:
+                self.last_paid_exit[plate] = max(exits + [self.last_paid_exit.get(plate, 0)])
+
+    # Lookups
+
+    def unpaid(self, plate):
+        """Latest unpaid record of a plate, or None"""
+        with self._lock:
+            sessions = self.open_sessions.get(plate)
+            if not sessions:
+                return None
+            return dict(max(sessions.values(), key=lambda record: record['entry_time']))
+
+    def entered_since(self, plate, cutoff):
+        return self.last_entry.get(plate, 0) > cutoff
+
+    def paid_exit_since(self, plate, cutoff):
+        return self.last_paid_exit.get(plate, 0) > cutoff
+
+    def covers(self, seconds):
+        """True if lookups `seconds` back fall within the kept history"""
+        return seconds <= self.horizon
+
+    def occupancy(self):
+        """Number of open (unpaid) sessions"""
+        return self.open_count
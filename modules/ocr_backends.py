@@ -0,0 +1,129 @@
+# modules/ocr_backends.py
+import threading
+import pytesseract
+
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM, RIL, iterate_level
+except ImportError:  # tesserocr is optional, pytesseract is the fallback
+    PyTessBaseAPI = None
+
+PLATE_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+TESSERACT_CONFIG = f'--psm 8 --oem 3 -c tessedit_char_whitelist={PLATE_WHITELIST}'
+
+
+class PytesseractBackend:
+    """OCR through the tesseract CLI (one subprocess and temp file per crop)"""
+
+    name = 'pytesseract'
+
+    def read(self, img):
+        """Read plate text from a single preprocessed crop"""
+        return pytesseract.image_to_string(img, config=TESSERACT_CONFIG).strip().replace(' ', '')
+
+    def read_batch(self, imgs):
+        """Read plate text from a list of preprocessed crops"""
+        return [self.read(img) for img in imgs]
+
+    def read_with_confidence(self, img):
+        """Read plate text and a 0-100 confidence per character
+
+        The CLI only reports word confidences, so each character gets the
+        confidence of the word it belongs to.
+        """
+        data = pytesseract.image_to_data(img, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        text, confidences = '', []
+        for word, conf in zip(data['text'], data['conf']):
+            word = word.strip().replace(' ', '')
+            if not word or float(conf) < 0:
+                continue
+            text += word
+            confidences.extend([float(conf)] * len(word))
+        return text, confidences
+
+    def read_batch_with_confidence(self, imgs):
+        """Read text and per-character confidences from a list of crops"""
+        return [self.read_with_confidence(img) for img in imgs]
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """OCR through an in-process tesseract engine that stays initialized
+
+    The whitelist and single-word page segmentation are configured once,
+    and crops are handed over as raw pixel buffers so no temp files are
+    written. The engine is not thread-safe, so calls are serialized.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng'):
+        if PyTessBaseAPI is None:
+            raise ImportError("tesserocr is not installed")
+        self.api = PyTessBaseAPI(lang=lang, psm=PSM.SINGLE_WORD, oem=OEM.DEFAULT)
+        self.api.SetVariable('tessedit_char_whitelist', PLATE_WHITELIST)
+        self._lock = threading.Lock()
+
+    def _set_image(self, img):
+        # tobytes() packs row-strided views (crops of reused buffers) in one copy
+        height, width = img.shape[:2]
+        channels = 1 if img.ndim == 2 else img.shape[2]
+        self.api.SetImageBytes(img.tobytes(), width, height, channels, width * channels)
+
+    def _read_locked(self, img):
+        self._set_image(img)
+        return self.api.GetUTF8Text().strip().replace(' ', '')
+
+    def read(self, img):
+        """Read plate text from a single preprocessed crop"""
+        with self._lock:
+            return self._read_locked(img)
+
+    def read_batch(self, imgs):
+        """Read plate text from a list of preprocessed crops in one engine session"""
+        with self._lock:
+            return [self._read_locked(img) for img in imgs]
+
+    def _read_symbols_locked(self, img):
+        self._set_image(img)
+        self.api.Recognize()
+        text, confidences = '', []
+        iterator = self.api.GetIterator()
+        if iterator is None:
+            return text, confidences
+        for symbol in iterate_level(iterator, RIL.SYMBOL):
+            char = (symbol.GetUTF8Text(RIL.SYMBOL) or '').strip()
+            if char:
+                text += char
+                confidences.append(symbol.Confidence(RIL.SYMBOL))
+        return text, confidences
+
+    def read_with_confidence(self, img):
+        """Read plate text and a 0-100 confidence per character"""
+        with self._lock:
+            return self._read_symbols_locked(img)
+
+    def read_batch_with_confidence(self, imgs):
+        """Read text and per-character confidences from a list of crops in one engine session"""
+        with self._lock:
+            return [self._read_symbols_locked(img) for img in imgs]
+
+    def close(self):
+        self.api.End()
+
+
+def create_ocr_backend(name='auto'):
+    """Create an OCR backend by name ('auto', 'tesserocr' or 'pytesseract')"""
+    if name == 'pytesseract':
+        return PytesseractBackend()
+    if name == 'tesserocr':
+        return TesserocrBackend()
+    if name == 'auto':
+        if PyTessBaseAPI is not None:
+            try:
+                return TesserocrBackend()
+            except RuntimeError as e:
+                print(f"[OCR] tesserocr unavailable ({e}), falling back to pytesseract")
+        return PytesseractBackend()
+    raise ValueError(f"Unknown OCR backend: {name}")
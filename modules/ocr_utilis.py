@@ -1,31 +1,115 @@
 # modules/ocr_utils.py
 import cv2
-import pytesseract
+import math
+import time
 from ultralytics import YOLO
 from collections import Counter
 import re
+from modules.ocr_backends import create_ocr_backend
+from modules.plate_tracker import PlateTracker
+from modules.plate_voting import PlateVoter
+from modules.plate_decoder import PlateDecoder
+from modules.preprocess import PlatePreprocessor
+from modules.motion_gate import MotionGate
+from modules.model_backends import load_detector, load_verify_frames, verify_detector
+
+
+class LaneState:
+    """Recognition state kept separately for each camera lane"""
+
+    def __init__(self, roi=None, motion_gating=True):
+        self.tracker = PlateTracker()
+        self.plate_voter = PlateVoter()  # Shared votes for reads without a track
+        self.motion_gate = MotionGate(roi=roi) if motion_gating else None
+
+    def reset(self):
+        self.plate_voter.clear()
+        self.tracker.reset()
+        if self.motion_gate:
+            self.motion_gate.reset()
 
 
 class PlateRecognizer:
-    def __init__(self, model_path='../models/runs/detect/train/weights/best.pt'):
-        self.model = YOLO(model_path)
-        self.plate_buffer = []
-        self.capture_threshold = 3
+    """Plate detector and reader, shareable between camera lanes
+
+    The model, OCR engine and preprocessing buffers are shared; tracks,
+    votes and motion gating are kept per `lane` (None for a single camera).
+    With `detect_width` YOLO sees a downscaled copy of each frame while
+    plates are still cropped from the full-resolution frame.
+    """
+
+    def __init__(self, model_path='../models/runs/detect/train/weights/best.pt', ocr_backend='auto',
+                 roi=None, motion_gating=True, backend='pytorch', imgsz=640, threads=None,
+                 verify_backend=True, correct_plates=True, keep_previews=True, detect_width=None,
+                 box_padding=0.0):
+        self.imgsz = imgsz
+        self.detect_width = detect_width  # Downscale frames wider than this before detection
+        self.box_padding = box_padding  # Extra margin around each box, as a fraction of its size
+        self.backend = backend
+        self.batch_inference = True  # Cleared if an exported model rejects multi-frame batches
+        self.model = load_detector(model_path, backend, imgsz, threads)
+        if backend != 'pytorch' and verify_backend:
+            self._verify_backend(model_path)
+        self.ocr = create_ocr_backend(ocr_backend)
+        self.roi = roi
+        self.motion_gating = motion_gating
+        self.lanes = {}
+        self.decoder = PlateDecoder()
+        self.correct_plates = correct_plates
+        self.correction_penalty = 0.8  # Vote weight multiplier per corrected character
+        self.preprocessor = PlatePreprocessor()
+        self.keep_previews = keep_previews  # Keep a copy of each processed crop for preview windows
+        self.last_timings = {}  # Per-stage seconds spent on the last detect_plates call
+        self.counters = Counter()
+
+    def lane_state(self, lane=None):
+        """Tracks, votes and motion gate of a lane, created on first use"""
+        if lane not in self.lanes:
+            self.lanes[lane] = LaneState(self.roi, self.motion_gating)
+        return self.lanes[lane]
+
+    def _verify_backend(self, model_path):
+        """Compare the exported model against PyTorch; fall back to PyTorch on mismatch"""
+        frames = load_verify_frames()
+        if not frames:
+            print(f"[MODEL] No saved frames to verify the {self.backend} backend, skipping check")
+            return
+
+        ok, message = verify_detector(YOLO(model_path), self.model, frames, self.imgsz)
+        if ok:
+            print(f"[MODEL] {self.backend} backend verified against PyTorch: {message}")
+        else:
+            print(f"[MODEL] {self.backend} backend does not match PyTorch ({message}), using PyTorch")
+            self.backend = 'pytorch'
+            self.model = YOLO(model_path)
 
     def preprocess_image(self, plate_img):
-        """Preprocess license plate image for better OCR"""
-        gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
-        blur = cv2.GaussianBlur(gray, (5, 5), 0)
-        thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-        return thresh
+        """Preprocess license plate image for better OCR
+
+        The result lives in a reused buffer and is overwritten after the
+        next frame; copy it to keep it.
+        """
+        return self.preprocessor.process(plate_img)
 
     def extract_text(self, processed_img):
         """Extract text from preprocessed image"""
-        text = pytesseract.image_to_string(
-            processed_img,
-            config='--psm 8 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-        ).strip().replace(' ', '')
-        return text
+        return self.ocr.read(processed_img)
+
+    def extract_texts(self, processed_imgs):
+        """Extract text from a list of preprocessed images in one OCR call"""
+        return self.ocr.read_batch(processed_imgs)
+
+    def extract_texts_with_confidence(self, processed_imgs):
+        """Extract (text, per-character confidences) from a list of preprocessed images"""
+        return self.ocr.read_batch_with_confidence(processed_imgs)
+
+    @staticmethod
+    def read_weight(detection_conf, char_confidences):
+        """Vote weight of a read: detection confidence times mean OCR confidence (0-1)"""
+        if not char_confidences:
+            return 0.0
+        ocr_conf = sum(char_confidences) / (100.0 * len(char_confidences))
+        return detection_conf * ocr_conf
 
     def validate_rwandan_plate(self, text):
         """Validate Rwandan license plate format (RAxxxA)"""
@@ -39,35 +123,215 @@ class PlateRecognizer:
             return plate
         return None
 
-    def detect_plates(self, frame):
-        """Detect license plates in frame and return validated plates"""
-        results = self.model(frame)[0]
-        detected_plates = []
+    def decode_plate(self, text, char_confidences=None):
+        """Turn a raw OCR read into (plate, corrections, plate_char_confidences)
+
+        With correction enabled near-miss reads are repaired against the
+        plate grammar; otherwise only exact matches are accepted.
+        """
+        if self.correct_plates:
+            return self.decoder.decode(text, char_confidences)
+        plate = self.validate_rwandan_plate(text)
+        if not plate:
+            return None, 0, []
+        return plate, 0, (char_confidences or [])[:len(plate)]
 
+    def _detection_frame(self, frame):
+        """Frame handed to YOLO and its scale relative to the full frame"""
+        width = frame.shape[1]
+        if not self.detect_width or width <= self.detect_width:
+            return frame, 1.0
+        scale = self.detect_width / width
+        size = (self.detect_width, round(frame.shape[0] * scale))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), scale
+
+    def _frame_boxes(self, results, scale, frame_shape):
+        """Boxes mapped back to full-frame pixels, padded and clamped to the frame"""
+        height, width = frame_shape[:2]
+        # Downscaled coordinates are only accurate to one detection pixel
+        margin = math.ceil(1 / scale) if scale < 1 else 0
+        boxes = []
         for box in results.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            x1, y1, x2, y2 = (float(value) / scale for value in box.xyxy[0])
+            pad_x = margin + self.box_padding * (x2 - x1)
+            pad_y = margin + self.box_padding * (y2 - y1)
+            boxes.append((
+                max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y)),
+                min(width, int(math.ceil(x2 + pad_x))), min(height, int(math.ceil(y2 + pad_y)))
+            ))
+        return boxes
+
+    def _should_infer(self, state, frame):
+        """Motion gate check; inference also runs while a track waits for reads"""
+        if not state.motion_gate:
+            return True
+        return state.motion_gate.should_infer(frame, pending=bool(state.tracker.unresolved_tracks()))
+
+    def detect_plates(self, frame, lane=None):
+        """Detect license plates in frame and return validated plates
+
+        Boxes are tracked across frames; tracks that already reached a
+        consensus are reported with their plate but are not OCR'd again.
+        YOLO is skipped (returning no plates and no results) while the ROI
+        is unchanged and no track is waiting for more reads. The returned
+        YOLO results are in detection (possibly downscaled) coordinates.
+        """
+        state = self.lane_state(lane)
+        if not self._should_infer(state, frame):
+            self.last_timings = {}
+            return [], None
+
+        timings = {'detect': 0.0, 'preprocess': 0.0, 'ocr': 0.0, 'validate': 0.0}
+        start = time.perf_counter()
+        detection_frame, scale = self._detection_frame(frame)
+        results = self.model(detection_frame, imgsz=self.imgsz, verbose=False)[0]
+        timings['detect'] = time.perf_counter() - start
+
+        detected_plates = self._read_plates(frame, self._frame_boxes(results, scale, frame.shape), results,
+                                            state, timings)
+        self.last_timings = timings
+        return detected_plates, results
+
+    def detect_plates_batch(self, frames):
+        """Detect plates for several lanes with a single YOLO call
+
+        `frames` maps lane -> frame; returns lane -> (detected_plates, results).
+        Lanes skipped by their motion gate get ([], None).
+        """
+        output = {lane: ([], None) for lane in frames}
+        pending = [(lane, frame) for lane, frame in frames.items()
+                   if self._should_infer(self.lane_state(lane), frame)]
+        if not pending:
+            self.last_timings = {}
+            return output
+
+        timings = {'detect': 0.0, 'preprocess': 0.0, 'ocr': 0.0, 'validate': 0.0}
+        start = time.perf_counter()
+        scaled = [self._detection_frame(frame) for _, frame in pending]
+        batch_results = self._detect_batch([detection_frame for detection_frame, _ in scaled])
+        timings['detect'] = time.perf_counter() - start
+        self.counters['batches'] += 1
+
+        for (lane, frame), (_, scale), results in zip(pending, scaled, batch_results):
+            boxes = self._frame_boxes(results, scale, frame.shape)
+            output[lane] = (self._read_plates(frame, boxes, results, self.lane_state(lane), timings), results)
+
+        self.last_timings = timings
+        return output
+
+    def _detect_batch(self, frames):
+        """YOLO results for several frames, one call when the model accepts batches"""
+        if len(frames) > 1 and self.batch_inference:
+            try:
+                return self.model(frames, imgsz=self.imgsz, verbose=False)
+            except Exception as e:
+                if self.backend == 'pytorch':
+                    raise
+                print(f"[WARNING] {self.backend} model rejected a {len(frames)}-frame batch ({e}); "
+                      f"detecting one frame at a time")
+                self.batch_inference = False
+        return [self.model(frame, imgsz=self.imgsz, verbose=False)[0] for frame in frames]
+
+    def _read_plates(self, frame, boxes, results, state, timings):
+        """Track, preprocess, OCR and validate the boxes YOLO found in one frame"""
+        self.preprocessor.begin_frame()
+        detected_plates = []
+
+        confidences = [float(box.conf[0]) for box in results.boxes]
+        tracks = state.tracker.update(boxes)
+
+        crops = []
+        for bbox, detection_conf, track in zip(boxes, confidences, tracks):
+            x1, y1, x2, y2 = bbox
+            if x2 <= x1 or y2 <= y1:
+                continue
             plate_img = frame[y1:y2, x1:x2]
 
-            processed = self.preprocess_image(plate_img)
-            text = self.extract_text(processed)
-            plate = self.validate_rwandan_plate(text)
+            if track.is_resolved():
+                detected_plates.append({
+                    'plate': track.plate,
+                    'image': plate_img,
+                    'processed': None,
+                    'bbox': bbox,
+                    'confidence': detection_conf,
+                    'weight': 0.0,
+                    'corrections': 0,
+                    'track_id': track.id,
+                    'resolved': True
+                })
+                continue
+
+            start = time.perf_counter()
+            crops.append((bbox, detection_conf, track, plate_img, self.preprocess_image(plate_img)))
+            timings['preprocess'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reads = self.extract_texts_with_confidence([crop[-1] for crop in crops])
+        timings['ocr'] += time.perf_counter() - start
+        self.counters['inferences'] += 1
+        self.counters['ocr_calls'] += len(crops)
+
+        for (bbox, detection_conf, track, plate_img, processed), (text, char_confidences) in zip(crops, reads):
+            track.ocr_reads += 1
+            start = time.perf_counter()
+            plate, corrections, plate_confidences = self.decode_plate(text, char_confidences)
+            timings['validate'] += time.perf_counter() - start
 
             if plate:
+                self.counters['valid_reads'] += 1
+                if corrections:
+                    self.counters['corrected_reads'] += 1
+                weight = self.read_weight(detection_conf, plate_confidences)
+                weight *= self.correction_penalty ** corrections
                 detected_plates.append({
                     'plate': plate,
                     'image': plate_img,
-                    'processed': processed,
-                    'bbox': (x1, y1, x2, y2)
+                    'processed': processed.copy() if self.keep_previews else None,
+                    'bbox': bbox,
+                    'confidence': detection_conf,
+                    'weight': weight,
+                    'corrections': corrections,
+                    'track_id': track.id,
+                    'resolved': False
                 })
 
-        return detected_plates, results
+        return detected_plates
 
-    def get_consensus_plate(self, plate):
-        """Add plate to buffer and return consensus when threshold is met"""
-        self.plate_buffer.append(plate)
+    def get_consensus_plate(self, plate, track_id=None, weight=0.5, lane=None):
+        """Add a weighted read to its track's votes and return the consensus once decided
 
-        if len(self.plate_buffer) >= self.capture_threshold:
-            consensus = Counter(self.plate_buffer).most_common(1)[0][0]
-            self.plate_buffer.clear()
+        Without a track id the read goes into the lane's shared voter.
+        The default weight needs three agreeing reads, as before weights
+        were introduced. A track returns its consensus once and is then
+        left alone until the tracker re-opens it.
+        """
+        state = self.lane_state(lane)
+        if track_id is None:
+            consensus = state.plate_voter.add(plate, weight)
+            if consensus:
+                state.plate_voter.clear()
             return consensus
-        return None
+
+        track = state.tracker.get(track_id)
+        if track is None or track.is_resolved():
+            return None
+
+        consensus = track.voter.add(plate, weight)
+        if consensus:
+            track.resolve(consensus)
+        return consensus
+
+    def reset(self):
+        """Forget all tracks and buffered reads on every lane"""
+        for state in self.lanes.values():
+            state.reset()
+
+    def stats(self):
+        """Inference gating and OCR counters, summed over lanes"""
+        stats = dict(self.counters)
+        gates = [state.motion_gate for state in self.lanes.values() if state.motion_gate]
+        if gates:
+            for key in ('frames', 'inferences_run', 'inferences_skipped'):
+                stats[key] = sum(gate.stats()[key] for gate in gates)
+            stats['skip_ratio'] = round(stats['inferences_skipped'] / stats['frames'], 3) if stats['frames'] else 0.0
+        return stats
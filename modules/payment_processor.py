@@ -2,19 +2,20 @@
 from math import ceil
 import serial
 import time
-from datetime import datetime
-from modules.database_utils import DatabaseManager
+from modules.database_utils import DatabaseManager, to_epoch
 
 
 class PaymentProcessor:
-    def __init__(self, rate_per_minute=9):
+    def __init__(self, rate_per_minute=9, db=None):
         self.rate_per_minute = rate_per_minute
-        self.db = DatabaseManager()
+        self.db = db or DatabaseManager()
 
-    def calculate_parking_fee(self, entry_time_str):
-        """Calculate parking fee based on duration rounded up to nearest hour"""
-        entry_time = datetime.strptime(entry_time_str, '%Y-%m-%d %H:%M:%S')
-        duration_seconds = (datetime.now() - entry_time).total_seconds()
+    def calculate_parking_fee(self, entry_time):
+        """Calculate parking fee based on duration rounded up to nearest hour
+
+        `entry_time` is epoch seconds, or a '%Y-%m-%d %H:%M:%S' string as stored before.
+        """
+        duration_seconds = time.time() - to_epoch(entry_time)
         duration_hours = ceil(duration_seconds / 3600)  # Always round up
         return duration_hours * 500  # 500 per hour
 
@@ -34,8 +35,24 @@ class PaymentProcessor:
         except ValueError:
             return None, None
 
-    def process_payment(self, plate, balance, serial_conn):
-        """Process payment for a parking session"""
+    @staticmethod
+    def serial_line_reader(serial_conn):
+        """`next_line(timeout)` reading straight from a port nobody else reads"""
+        def next_line(timeout):
+            serial_conn.timeout = max(timeout, 0)
+            raw = serial_conn.readline()
+            return raw.decode('utf-8', errors='replace').strip() if raw else None
+        return next_line
+
+    def process_payment(self, plate, balance, serial_conn, next_line=None):
+        """Process payment for a parking session
+
+        Replies from the card reader come from `next_line(timeout)`, which
+        returns the next line as soon as it arrives or None on timeout.
+        `serial_conn` is anything with a serial-like `write`, such as a
+        GateController, whose write returns False while offline.
+        """
+        next_line = next_line or self.serial_line_reader(serial_conn)
         record = self.db.get_unpaid_record(plate)
         if not record:
             print(f"[PAYMENT] No unpaid record found for {plate}")
@@ -46,42 +63,41 @@ class PaymentProcessor:
 
         if balance < amount_due:
             print(f"[PAYMENT] Insufficient balance. Need: {amount_due}, Have: {balance}")
-            serial_conn.write(b'I\n')  # Insufficient funds
+            if not serial_conn.write(b'I\n'):  # Insufficient funds
+                print(f"[PAYMENT] Could not send the insufficient balance reply for {plate}")
             return False
 
         new_balance = balance - amount_due
 
         # Wait for Arduino ready signal
-        if self._wait_for_arduino_ready(serial_conn):
-            serial_conn.write(f"{new_balance}\r\n".encode())
+        if self._wait_for_arduino_ready(next_line):
+            if not serial_conn.write(f"{new_balance}\r\n".encode()):
+                print(f"[PAYMENT] Could not send the new balance for {plate}, Arduino offline")
+                return False
             print(f"[PAYMENT] Sent new balance: {new_balance}")
 
-            if self._wait_for_confirmation(serial_conn):
+            if self._wait_for_confirmation(next_line):
                 self.db.mark_as_paid(plate)
                 print(f"[PAYMENT] Payment successful for {plate}")
                 return True
 
         return False
 
-    def _wait_for_arduino_ready(self, serial_conn, timeout=5):
+    def _wait_for(self, next_line, matches, timeout):
+        """Block on incoming lines until one matches or the deadline passes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            response = next_line(remaining)
+            if response is not None and matches(response):
+                return True
+
+    def _wait_for_arduino_ready(self, next_line, timeout=5):
         """Wait for Arduino READY signal"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if serial_conn.in_waiting:
-                response = serial_conn.readline().decode().strip()
-                if response == "READY":
-                    return True
-            time.sleep(0.1)
-        return False
+        return self._wait_for(next_line, lambda response: response == "READY", timeout)
 
-    def _wait_for_confirmation(self, serial_conn, timeout=10):
+    def _wait_for_confirmation(self, next_line, timeout=10):
         """Wait for Arduino confirmation"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if serial_conn.in_waiting:
-                response = serial_conn.readline().decode().strip()
-                if "DONE" in response:
-                    return True
-            time.sleep(0.1)
-        return False
-
+        return self._wait_for(next_line, lambda response: "DONE" in response, timeout)
@@ -0,0 +1,420 @@
+# modules/pipeline.py
+import queue
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item when full"""
+
+    def __init__(self, maxsize=2, ready_event=None):
+        self.items = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.ready_event = ready_event  # Optional event shared by several queues, set on put
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Add an item, evicting the oldest one if the queue is full"""
+        with self._cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self._cond.notify()
+        if self.ready_event:
+            self.ready_event.set()
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None on timeout"""
+        with self._cond:
+            if not self.items and timeout != 0:
+                self._cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def depth(self):
+        """Number of items currently waiting"""
+        return len(self.items)
+
+
+class StageStats:
+    """Throughput counter for a single pipeline stage"""
+
+    def __init__(self, name, window=5.0):
+        self.name = name
+        self.window = window
+        self.count = 0
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        """Record one processed item"""
+        now = time.monotonic()
+        with self._lock:
+            self.count += 1
+            self._stamps.append(now)
+            while self._stamps and now - self._stamps[0] > self.window:
+                self._stamps.popleft()
+
+    def fps(self):
+        """Items per second over the sliding window"""
+        now = time.monotonic()
+        with self._lock:
+            while self._stamps and now - self._stamps[0] > self.window:
+                self._stamps.popleft()
+            return len(self._stamps) / self.window
+
+
+class CaptureStage:
+    """Camera reader thread that keeps only the newest frame
+
+    Frames that pass `should_infer` are put on `out_queue` for inference.
+    """
+
+    def __init__(self, cap, out_queue, should_infer=None, on_failure=None, name='capture'):
+        self.cap = cap
+        self.out_queue = out_queue
+        self.should_infer = should_infer or (lambda: True)
+        self.on_failure = on_failure
+        self.name = name
+        self.stats = StageStats(name)
+        self._latest_frame = None
+        self._frame_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def latest_frame(self):
+        """Most recent frame read from the camera"""
+        with self._frame_lock:
+            return self._latest_frame
+
+    def _loop(self):
+        while not self._stop.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.on_failure:
+                    self.on_failure("Frame capture failed")
+                break
+
+            with self._frame_lock:
+                self._latest_frame = frame
+            self.stats.tick()
+
+            if self.should_infer():
+                self.out_queue.put(frame)
+
+
+class DecisionStage:
+    """Thread calling `decide(plate, plate_data, frame)` for each consensus plate
+
+    Unlike frames, decisions are never dropped: a track reports its
+    consensus only once, so a lost decision is a car that is never let in
+    or billed. When the queue is full `put` blocks the caller (the
+    inference thread) until the decision thread catches up.
+    """
+
+    def __init__(self, decide, queue_size=8, on_error=None, name='decision'):
+        self.decide = decide
+        self.queue = queue.Queue(queue_size)
+        self.full_waits = 0  # Times the inference thread had to wait for a free slot
+        self.on_error = on_error
+        self.name = name
+        self.stats = StageStats(name)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def put(self, plate, plate_data, frame):
+        """Queue a decision, waiting while the queue is full; False if the stage stopped first"""
+        item = (plate, plate_data, frame)
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.full_waits += 1
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        if self.on_error:
+            self.on_error(f"Decision for {plate} lost: stage stopped with a full queue")
+        return False
+
+    def _loop(self):
+        # Pending decisions are still handled after stop()
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self.decide(*item)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(f"Decision failed: {e}")
+            self.stats.tick()
+
+    def report(self):
+        return {
+            'rate': round(self.stats.fps(), 2),
+            'decisions': self.stats.count,
+            'queue_depth': self.queue.qsize(),
+            'full_waits': self.full_waits,
+        }
+
+
+class PipelineReporter:
+    """Periodic stats logging shared by the pipelines"""
+
+    def report_if_due(self):
+        """Log stage stats every `stats_interval` seconds"""
+        now = time.monotonic()
+        if now - self._last_report < self.stats_interval:
+            return
+        self._last_report = now
+        message = ' | '.join(
+            f"{stage}: " + ', '.join(f"{k}={v}" for k, v in values.items())
+            for stage, values in self.stats().items()
+        )
+        if self.logger:
+            self.logger.log_info(f"[{self.name}] {message}")
+        else:
+            print(f"[{self.name}] {message}")
+
+    def _log_error(self, message):
+        if self.logger:
+            self.logger.log_error(f"[{self.name}] {message}")
+        else:
+            print(f"[{self.name}] [ERROR] {message}")
+
+
+class RecognitionPipeline(PipelineReporter):
+    """Capture -> inference -> decision pipeline running on separate threads
+
+    The capture thread only ever keeps the newest frame. Frames that pass
+    `should_infer` go through a bounded drop-oldest queue to the inference
+    worker, whose decisions are handed to the decision stage through a
+    bounded blocking queue, so none are lost.
+    """
+
+    def __init__(self, cap, infer, decide, should_infer=None, logger=None,
+                 name='PIPELINE', frame_queue_size=2, decision_queue_size=8,
+                 stats_interval=30, extra_stats=None):
+        self.infer = infer
+        self.logger = logger
+        self.name = name
+        self.stats_interval = stats_interval
+        self.extra_stats = extra_stats
+
+        self.frame_queue = DropOldestQueue(frame_queue_size)
+        self.capture = CaptureStage(cap, self.frame_queue, should_infer, self._on_capture_failure,
+                                    name=f"{name}-capture")
+        self.decision = DecisionStage(decide, decision_queue_size, self._log_error,
+                                      name=f"{name}-decision")
+        self.inference_stats = StageStats('inference')
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_report = time.monotonic()
+
+    def start(self):
+        """Start the capture, inference and decision threads"""
+        self.capture.start()
+        self.decision.start()
+        self._thread = threading.Thread(target=self._inference_loop, name=f"{self.name}-inference", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all stages to stop and wait for them"""
+        self._stop.set()
+        self.capture.stop(timeout)
+        if self._thread:
+            self._thread.join(timeout)
+        self.decision.stop(timeout)
+
+    def is_running(self):
+        """True until a stage fails or stop() is called"""
+        return not self._stop.is_set()
+
+    def latest_frame(self):
+        """Most recent frame read from the camera"""
+        return self.capture.latest_frame()
+
+    def _on_capture_failure(self, message):
+        self._log_error(message)
+        self._stop.set()
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            frame = self.frame_queue.get(timeout=0.1)
+            if frame is None:
+                continue
+            try:
+                decisions = self.infer(frame)
+            except Exception as e:
+                self._log_error(f"Inference failed: {e}")
+                continue
+            self.inference_stats.tick()
+
+            for plate, plate_data in decisions or ():
+                self.decision.put(plate, plate_data, frame)
+
+    def stats(self):
+        """Per-stage throughput and queue depth"""
+        stats = {
+            'capture': {
+                'fps': round(self.capture.stats.fps(), 1),
+                'frames': self.capture.stats.count,
+            },
+            'inference': {
+                'fps': round(self.inference_stats.fps(), 1),
+                'frames': self.inference_stats.count,
+                'queue_depth': self.frame_queue.depth(),
+                'dropped': self.frame_queue.dropped,
+            },
+            'decision': self.decision.report(),
+        }
+        if self.extra_stats:
+            extra = self.extra_stats()
+            if extra:
+                stats['gating'] = extra
+        return stats
+
+
+class BatchedRecognitionPipeline(PipelineReporter):
+    """Several camera lanes sharing one batched inference worker
+
+    Every lane has its own capture thread and decision thread. The single
+    inference worker takes the newest pending frame of each lane, runs
+    `infer_batch({lane: frame})` once for all of them and routes the
+    returned decisions back to the lane they came from.
+    """
+
+    def __init__(self, lanes, infer_batch, logger=None, name='MULTI-LANE', frame_queue_size=1,
+                 decision_queue_size=8, stats_interval=30, extra_stats=None):
+        # lanes: {lane: (cap, should_infer, decide)}
+        self.infer_batch = infer_batch
+        self.logger = logger
+        self.name = name
+        self.stats_interval = stats_interval
+        self.extra_stats = extra_stats
+
+        self._frames_ready = threading.Event()
+        self.frame_queues = {}
+        self.captures = {}
+        self.decisions = {}
+        self._failed_lanes = set()
+        for lane, (cap, should_infer, decide) in lanes.items():
+            self.frame_queues[lane] = DropOldestQueue(frame_queue_size, self._frames_ready)
+            self.captures[lane] = CaptureStage(
+                cap, self.frame_queues[lane], should_infer,
+                lambda message, lane=lane: self._on_capture_failure(lane, message),
+                name=f"{name}-{lane}-capture"
+            )
+            self.decisions[lane] = DecisionStage(decide, decision_queue_size, self._log_error,
+                                                 name=f"{name}-{lane}-decision")
+
+        self.inference_stats = StageStats('inference')
+        self.batched_frames = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_report = time.monotonic()
+
+    def start(self):
+        """Start all lane threads and the shared inference worker"""
+        for lane in self.captures:
+            self.captures[lane].start()
+            self.decisions[lane].start()
+        self._thread = threading.Thread(target=self._inference_loop, name=f"{self.name}-inference", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all stages to stop and wait for them"""
+        self._stop.set()
+        for capture in self.captures.values():
+            capture.stop(timeout)
+        if self._thread:
+            self._thread.join(timeout)
+        for decision in self.decisions.values():
+            decision.stop(timeout)
+
+    def is_running(self):
+        """True while at least one lane camera is delivering frames"""
+        return not self._stop.is_set()
+
+    def latest_frame(self, lane):
+        return self.captures[lane].latest_frame()
+
+    def _on_capture_failure(self, lane, message):
+        self._log_error(f"{lane}: {message}")
+        self._failed_lanes.add(lane)
+        if len(self._failed_lanes) == len(self.captures):
+            self._stop.set()
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            self._frames_ready.wait(0.1)
+            self._frames_ready.clear()
+
+            batch = {}
+            for lane, frame_queue in self.frame_queues.items():
+                frame = frame_queue.get(timeout=0)
+                if frame is not None:
+                    batch[lane] = frame
+            if not batch:
+                continue
+
+            try:
+                decisions_by_lane = self.infer_batch(batch)
+            except Exception as e:
+                self._log_error(f"Inference failed: {e}")
+                continue
+            self.inference_stats.tick()
+            self.batched_frames += len(batch)
+
+            for lane, decisions in decisions_by_lane.items():
+                for plate, plate_data in decisions or ():
+                    self.decisions[lane].put(plate, plate_data, batch[lane])
+
+    def stats(self):
+        """Per-lane capture/decision stats and shared inference throughput"""
+        batches = self.inference_stats.count
+        stats = {
+            'inference': {
+                'batches_per_s': round(self.inference_stats.fps(), 1),
+                'batches': batches,
+                'mean_batch': round(self.batched_frames / batches, 2) if batches else 0,
+            },
+        }
+        for lane in self.captures:
+            stats[lane] = {
+                'capture_fps': round(self.captures[lane].stats.fps(), 1),
+                'queue_depth': self.frame_queues[lane].depth(),
+                'dropped': self.frame_queues[lane].dropped,
+                'decisions': self.decisions[lane].stats.count,
+            }
+        if self.extra_stats:
+            extra = self.extra_stats()
+            if extra:
+                stats['gating'] = extra
+        return stats
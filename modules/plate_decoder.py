@@ -0,0 +1,82 @@
+# modules/plate_decoder.py
+
+# Rwandan plate grammar: R A <letter> <digit> <digit> <digit> <letter>
+PLATE_LENGTH = 7
+PLATE_GRAMMAR = ('R', 'A', 'letter', 'digit', 'digit', 'digit', 'letter')
+
+# Common OCR confusions, per target character class
+TO_LETTER = {'0': 'O', '1': 'I', '2': 'Z', '4': 'A', '5': 'S', '6': 'G', '7': 'T', '8': 'B'}
+TO_DIGIT = {'O': '0', 'D': '0', 'Q': '0', 'U': '0', 'I': '1', 'L': '1', 'T': '7', 'J': '7',
+            'Z': '2', 'S': '5', 'B': '8', 'G': '6', 'A': '4'}
+TO_FIXED = {'R': {'P': 'R', 'K': 'R'}, 'A': {'4': 'A'}}
+
+# A window can only start where the read has an R or something OCR confuses with one
+PREFIX_ANCHORS = frozenset({'R'} | set(TO_FIXED['R']))
+
+
+def correct_char(char, expected):
+    """Return (char fitting the grammar slot, corrected?) or (None, False) if impossible"""
+    if expected == 'letter':
+        if char.isalpha():
+            return char, False
+        return (TO_LETTER[char], True) if char in TO_LETTER else (None, False)
+    if expected == 'digit':
+        if char.isdigit():
+            return char, False
+        return (TO_DIGIT[char], True) if char in TO_DIGIT else (None, False)
+    if char == expected:
+        return char, False
+    fixed = TO_FIXED.get(expected, {})
+    return (fixed[char], True) if char in fixed else (None, False)
+
+
+class PlateDecoder:
+    """Recover valid plates from near-miss OCR reads using the plate grammar
+
+    Every 7-character window of the read that starts at an R (or P/K) is
+    mapped onto the grammar with per-position confusion maps (O/0, I/1,
+    B/8, S/5, ...). Corrections to the RA prefix count against the same
+    `max_corrections` budget as the rest, and at most one of its two
+    characters may be corrected, so the prefix always anchors on a
+    character OCR actually read as R or A. Candidates are
+    ranked by correction cost, where correcting a character OCR was
+    confident about costs more than correcting a doubtful one, and then by
+    how far the window is from the start of the read.
+    """
+
+    def __init__(self, max_corrections=2):
+        self.max_corrections = max_corrections
+
+    def candidates(self, text, confidences=None):
+        """Ranked list of (plate, corrections, cost, start) for a raw OCR read"""
+        text = text.upper()
+        ranked = []
+        for start in range(len(text) - PLATE_LENGTH + 1):
+            if text[start] not in PREFIX_ANCHORS:
+                continue
+            chars, corrections, cost = [], 0, 0.0
+            for offset, expected in enumerate(PLATE_GRAMMAR):
+                char, corrected = correct_char(text[start + offset], expected)
+                if char is None or (offset == 1 and corrected and corrections):
+                    break  # Not the grammar, or neither R nor A was read as such
+                if corrected:
+                    corrections += 1
+                    if confidences and start + offset < len(confidences):
+                        cost += confidences[start + offset] / 100.0
+                    else:
+                        cost += 1.0
+                chars.append(char)
+            else:
+                if corrections <= self.max_corrections:
+                    ranked.append((''.join(chars), corrections, cost, start))
+
+        ranked.sort(key=lambda candidate: (candidate[2], candidate[3]))
+        return ranked
+
+    def decode(self, text, confidences=None):
+        """Best (plate, corrections, plate_confidences) or (None, 0, [])"""
+        ranked = self.candidates(text, confidences)
+        if not ranked:
+            return None, 0, []
+        plate, corrections, _, start = ranked[0]
+        return plate, corrections, (confidences or [])[start:start + PLATE_LENGTH]
@@ -0,0 +1,134 @@
+# modules/plate_tracker.py
+import time
+from modules.plate_voting import PlateVoter
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def box_centroid(box):
+    return (box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0
+
+
+class Track:
+    """A plate box followed across frames, with its own weighted OCR votes"""
+
+    def __init__(self, track_id, bbox, now):
+        self.id = track_id
+        self.bbox = bbox
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 1
+        self.ocr_reads = 0
+        self.voter = PlateVoter()
+        self.plate = None
+        self.resolved_at = None
+
+    def is_resolved(self, now=None, ttl=None):
+        """True while the track has a consensus plate that has not expired"""
+        if self.plate is None:
+            return False
+        if ttl is None:
+            return True
+        return ((now or time.monotonic()) - self.resolved_at) < ttl
+
+    def resolve(self, plate, now=None):
+        self.plate = plate
+        self.resolved_at = now or time.monotonic()
+
+    def reopen(self):
+        """Forget the consensus so the track is voted on again"""
+        self.plate = None
+        self.resolved_at = None
+        self.ocr_reads = 0
+        self.voter.clear()
+
+
+class PlateTracker:
+    """Greedy IoU tracker with a centroid-distance fallback
+
+    Tracks are matched by best IoU first; boxes that barely overlap any
+    track can still be matched by centroid distance, which covers plates
+    moving quickly at low frame rates. Tracks not seen for `max_age`
+    seconds are dropped, and a resolved track is re-voted after
+    `resolved_ttl` seconds so a car that stays at the gate is re-checked.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_distance=80, max_age=2.0, resolved_ttl=30,
+                 max_ocr_reads=15):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_age = max_age
+        self.resolved_ttl = resolved_ttl
+        self.max_ocr_reads = max_ocr_reads
+        self.tracks = {}
+        self._next_id = 1
+
+    def update(self, boxes, now=None):
+        """Assign each box to a track and return the tracks in box order"""
+        now = now or time.monotonic()
+
+        # Drop stale tracks
+        for track_id in [tid for tid, t in self.tracks.items() if now - t.last_seen > self.max_age]:
+            del self.tracks[track_id]
+
+        candidates = []
+        for i, box in enumerate(boxes):
+            cx, cy = box_centroid(box)
+            for track in self.tracks.values():
+                iou = box_iou(box, track.bbox)
+                tx, ty = box_centroid(track.bbox)
+                distance = ((cx - tx) ** 2 + (cy - ty) ** 2) ** 0.5
+                if iou >= self.iou_threshold or distance <= self.max_centroid_distance:
+                    candidates.append((-iou, distance, i, track.id))
+        candidates.sort()
+
+        assigned = [None] * len(boxes)
+        used_tracks = set()
+        for _, _, i, track_id in candidates:
+            if assigned[i] is not None or track_id in used_tracks:
+                continue
+            track = self.tracks[track_id]
+            track.bbox = boxes[i]
+            track.last_seen = now
+            track.hits += 1
+            assigned[i] = track
+            used_tracks.add(track_id)
+
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                track = Track(self._next_id, box, now)
+                self._next_id += 1
+                self.tracks[track.id] = track
+                assigned[i] = track
+
+        for track in assigned:
+            if track.plate is not None and not track.is_resolved(now, self.resolved_ttl):
+                track.reopen()
+
+        return assigned
+
+    def get(self, track_id):
+        return self.tracks.get(track_id)
+
+    def unresolved_tracks(self):
+        """Live tracks that still need OCR reads
+
+        A track that has been read `max_ocr_reads` times without a
+        consensus is given up on so an unreadable plate cannot keep
+        inference running forever.
+        """
+        return [t for t in self.tracks.values()
+                if t.plate is None and t.ocr_reads < self.max_ocr_reads]
+
+    def reset(self):
+        self.tracks.clear()
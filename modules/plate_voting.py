@@ -0,0 +1,67 @@
+# modules/plate_voting.py
+import time
+from collections import defaultdict
+
+
+class PlateVoter:
+    """Confidence-weighted plate vote with expiry and early exit
+
+    Each read is weighted by detection confidence times mean OCR character
+    confidence (0-1). A plate is decided once its score reaches
+    `decision_score` and it holds at least `dominance` of the total score,
+    so disagreeing reads push the decision out until one plate clearly
+    leads. A single read at or above `early_exit_weight` with no competing
+    reads is accepted straight away. Votes older than `vote_ttl` seconds
+    are forgotten, and after `max_votes` reads a simple majority is enough.
+    """
+
+    def __init__(self, decision_score=1.5, early_exit_weight=0.9, dominance=0.75,
+                 vote_ttl=10.0, max_votes=8):
+        self.decision_score = decision_score
+        self.early_exit_weight = early_exit_weight
+        self.dominance = dominance
+        self.vote_ttl = vote_ttl
+        self.max_votes = max_votes
+        self.votes = []  # (timestamp, plate, weight)
+
+    def add(self, plate, weight, now=None):
+        """Record a read and return the decided plate, if any"""
+        now = now or time.monotonic()
+        self.votes.append((now, plate, weight))
+        return self.decide(now)
+
+    def scores(self, now=None):
+        """Summed weight per plate over the unexpired votes"""
+        now = now or time.monotonic()
+        self.votes = [vote for vote in self.votes if now - vote[0] <= self.vote_ttl]
+        scores = defaultdict(float)
+        for _, plate, weight in self.votes:
+            scores[plate] += weight
+        return scores
+
+    def decide(self, now=None):
+        """Return the winning plate when the evidence is strong enough"""
+        scores = self.scores(now)
+        if not scores:
+            return None
+
+        total = sum(scores.values())
+        if total <= 0:
+            return None  # Only zero-weight reads, e.g. OCR without character confidences
+
+        plate, score = max(scores.items(), key=lambda item: item[1])
+        share = score / total
+
+        if len(self.votes) == 1 and score >= self.early_exit_weight:
+            return plate
+        if score >= self.decision_score and share >= self.dominance:
+            return plate
+        if len(self.votes) >= self.max_votes and share > 0.5:
+            return plate
+        return None
+
+    def clear(self):
+        self.votes = []
+
+    def __len__(self):
+        return len(self.votes)
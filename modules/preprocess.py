@@ -0,0 +1,49 @@
+# modules/preprocess.py
+import cv2
+import numpy as np
+
+
+class PlatePreprocessor:
+    """Gray -> blur -> Otsu threshold into reusable, size-bucketed buffers
+
+    Buffers are allocated per size bucket (crop size rounded up to
+    `bucket` pixels) and reused on later frames; each crop works in a view
+    of its bucket's buffer, so steady-state preprocessing allocates no
+    new arrays. The returned image is a view that stays valid until the
+    next `begin_frame()`, so callers must copy it if they keep it longer.
+    Not thread-safe; use one instance per inference thread.
+    """
+
+    def __init__(self, bucket=32):
+        self.bucket = bucket
+        self.pools = {}  # (height, width) -> [(gray, blur), ...]
+        self.in_use = {}  # (height, width) -> buffers handed out this frame
+
+    def _bucket_size(self, value):
+        return -(-value // self.bucket) * self.bucket
+
+    def begin_frame(self):
+        """Release all buffers handed out for the previous frame"""
+        self.in_use.clear()
+
+    def _buffers(self, height, width):
+        key = (self._bucket_size(height), self._bucket_size(width))
+        pool = self.pools.setdefault(key, [])
+        index = self.in_use.get(key, 0)
+        if index == len(pool):
+            pool.append((np.empty(key, dtype=np.uint8), np.empty(key, dtype=np.uint8)))
+        self.in_use[key] = index + 1
+        gray, blur = pool[index]
+        return gray[:height, :width], blur[:height, :width]
+
+    def process(self, plate_img):
+        """Preprocess a plate crop (a view of the frame) for OCR"""
+        height, width = plate_img.shape[:2]
+        gray, blur = self._buffers(height, width)
+        cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=blur)
+        cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+        return gray
+
+    def allocated_bytes(self):
+        return sum(gray.nbytes + blur.nbytes for pool in self.pools.values() for gray, blur in pool)
@@ -0,0 +1,69 @@
+# modules/presence_filter.py
+import threading
+import time
+from collections import deque
+
+
+class PresenceFilter:
+    """Median-filtered distance with a hysteresis "vehicle present" state
+
+    A car arrives once the median of the last `window` samples falls in
+    [min_distance, max_distance] and only leaves once the median moves
+    more than `hysteresis` cm outside that range, so a single noisy echo
+    neither starts nor stops inference. Samples older than `stale_after`
+    seconds count as no reading at all.
+    """
+
+    def __init__(self, min_distance=0, max_distance=50, hysteresis=10, window=5, stale_after=2.0):
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.hysteresis = hysteresis
+        self.stale_after = stale_after
+        self.samples = deque(maxlen=window)
+        self.present = False
+        self.distance = None
+        self.last_sample = 0.0
+        self._lock = threading.Lock()
+
+    def set_range(self, min_distance, max_distance, hysteresis=None):
+        with self._lock:
+            self.min_distance = min_distance
+            self.max_distance = max_distance
+            if hysteresis is not None:
+                self.hysteresis = hysteresis
+            self.present = self._in_range(self.distance, 0) if self.distance is not None else False
+
+    def _in_range(self, distance, margin):
+        return self.min_distance - margin <= distance <= self.max_distance + margin
+
+    def add(self, distance, now=None):
+        """Add a raw sample and update the filtered state"""
+        with self._lock:
+            self.samples.append(distance)
+            self.last_sample = time.monotonic() if now is None else now
+            self.distance = sorted(self.samples)[len(self.samples) // 2]
+            if self.present:
+                self.present = self._in_range(self.distance, self.hysteresis)
+            else:
+                self.present = self._in_range(self.distance, 0)
+
+    def _fresh(self, now):
+        return self.distance is not None and now - self.last_sample <= self.stale_after
+
+    def latest(self, now=None):
+        """Filtered distance in cm, or None without recent samples"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self.distance if self._fresh(now) else None
+
+    def is_present(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self.present and self._fresh(now)
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.present = False
+            self.distance = None
+            self.last_sample = 0.0
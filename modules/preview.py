@@ -0,0 +1,102 @@
+# modules/preview.py
+import json
+import threading
+import time
+import cv2
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PREVIEW_PORTS = {'entry': 8101, 'exit': 8102, 'multi': 8103}
+PREVIEW_KINDS = ('annotated', 'plate', 'processed')
+
+
+class PreviewPublisher:
+    """Latest preview images of each lane, JPEG-encoded only when requested
+
+    Lanes hand over references to their newest frame and plate crops;
+    nothing is copied, drawn or encoded until a viewer (the dashboard's
+    MJPEG endpoint) asks for `/<lane>/<kind>.jpg` on the local HTTP port.
+    """
+
+    def __init__(self, port, host='127.0.0.1', quality=80, watch_timeout=2.0):
+        self.port = port
+        self.host = host
+        self.quality = quality
+        self.watch_timeout = watch_timeout
+        self.lanes = {}  # lane -> {'frame', 'bbox', 'plate', 'processed'}
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def publish(self, lane, frame, plate_data=None):
+        """Store references to the lane's latest frame and plate preview"""
+        with self._lock:
+            entry = self.lanes.setdefault(lane, {'frame': None, 'bbox': None, 'plate': None, 'processed': None})
+            entry['frame'] = frame
+            if plate_data is not None:
+                entry['bbox'] = plate_data['bbox']
+                entry['plate'] = plate_data['image']
+                if plate_data['processed'] is not None:
+                    entry['processed'] = plate_data['processed']
+
+    def is_watched(self):
+        """True if a viewer requested a frame recently"""
+        return time.monotonic() - self._last_request < self.watch_timeout
+
+    def encode(self, lane, kind):
+        """JPEG bytes of a lane's preview, or None if there is nothing to show"""
+        self._last_request = time.monotonic()
+        with self._lock:
+            entry = self.lanes.get(lane)
+            if entry is None:
+                return None
+            if kind == 'annotated':
+                image, bbox = entry['frame'], entry['bbox']
+            else:
+                image, bbox = entry.get(kind), None
+        if image is None:
+            return None
+
+        if bbox is not None:
+            image = image.copy()
+            cv2.rectangle(image, bbox[:2], bbox[2:], (0, 255, 0), 2)
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ok else None
+
+    def start(self):
+        """Serve previews on a background thread"""
+        publisher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.strip('/')
+                if path == 'lanes':
+                    body = json.dumps({'lanes': list(publisher.lanes), 'kinds': PREVIEW_KINDS}).encode()
+                    return self._reply(200, 'application/json', body)
+
+                lane, _, name = path.rpartition('/')
+                kind = name[:-4] if name.endswith('.jpg') else name
+                jpeg = publisher.encode(lane, kind) if kind in PREVIEW_KINDS else None
+                if jpeg is None:
+                    return self._reply(404, 'text/plain', b'No preview')
+                self._reply(200, 'image/jpeg', jpeg)
+
+            def _reply(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='preview-server', daemon=True).start()
+        print(f"[PREVIEW] Serving previews on http://{self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,35 @@
+# modules/thread_limits.py
+"""CPU thread limits for the inference libraries.
+
+OpenMP, MKL and OpenBLAS read their thread counts from the environment
+once, when torch (or numpy) is first imported, so `limit_threads_env`
+must run before those imports: entry scripts call it with
+`threads_from_argv()` ahead of their other imports. This module imports
+nothing heavy for that reason.
+"""
+import argparse
+import os
+import sys
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def threads_from_argv(argv=None):
+    """Value of `--threads N` on the command line, or None"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--threads', type=int, default=None)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.threads
+
+
+def limit_threads_env(threads):
+    """Export the thread limit for OpenMP/MKL/OpenBLAS; False (with a warning) if it is too late"""
+    if not threads:
+        return True
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if 'torch' in sys.modules:
+        print(f"[WARNING] torch was imported before the thread limit was set; "
+              f"{', '.join(THREAD_ENV_VARS)} have no effect on it")
+        return False
+    return True
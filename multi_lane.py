@@ -0,0 +1,92 @@
+import time
+import cv2
+from car_entry import CarEntrySystem
+from car_exit import CarExitSystem
+from modules.database_utils import DatabaseManager
+from modules.lane_system import MODEL_PATH
+from modules.logger import ParkingLogger
+from modules.ocr_utilis import PlateRecognizer
+from modules.pipeline import BatchedRecognitionPipeline
+
+LANE_TYPES = {'entry': CarEntrySystem, 'exit': CarExitSystem}
+
+
+def parse_lane(spec):
+    """Parse a lane spec 'entry|exit:camera[:serial_port]', e.g. 'exit:1:/dev/ttyACM1'"""
+    parts = spec.split(':', 2)
+    lane_type = parts[0].lower()
+    if lane_type not in LANE_TYPES or len(parts) < 2:
+        raise ValueError(f"Invalid lane '{spec}'. Use entry|exit:camera[:port]")
+    camera = int(parts[1]) if parts[1].isdigit() else parts[1]
+    port = parts[2] if len(parts) > 2 else None
+    return lane_type, camera, port
+
+
+class MultiLaneSystem:
+    """Several entry/exit lanes served by one process and one shared PlateRecognizer
+
+    Each lane keeps its own camera, gate controller and entry/exit logic;
+    the database (with its occupancy index and denial writer) is shared,
+    and frames from all lanes are batched into a single YOLO call.
+    """
+
+    def __init__(self, lanes, headless=False, preview=None, **recognizer_options):
+        self.headless = headless
+        self.logger = ParkingLogger()
+        self.plate_recognizer = PlateRecognizer(MODEL_PATH, **recognizer_options)
+        self.db = DatabaseManager()
+
+        self.systems = {}
+        pipeline_lanes = {}
+        for index, (lane_type, camera, port) in enumerate(lanes):
+            name = f"{lane_type}-{index}"
+            system = LANE_TYPES[lane_type](
+                plate_recognizer=self.plate_recognizer, camera=camera, port=port, lane=name,
+                headless=headless, preview=preview, db=self.db
+            )
+            self.systems[name] = system
+            pipeline_lanes[name] = (system.cap, system._vehicle_present, system._decide)
+
+        self.pipeline = BatchedRecognitionPipeline(
+            pipeline_lanes,
+            infer_batch=self._process_frames,
+            logger=self.logger,
+            extra_stats=self.plate_recognizer.stats
+        )
+
+    def _process_frames(self, frames):
+        """Batch-detect plates for all lanes and return each lane's consensus decisions"""
+        detections = self.plate_recognizer.detect_plates_batch(frames)
+        return {
+            lane: self.systems[lane]._collect_decisions(detected_plates)
+            for lane, (detected_plates, results) in detections.items()
+        }
+
+    def run(self):
+        """Main multi-lane loop"""
+        self.logger.log_info(f"Multi-lane system started with lanes: {', '.join(self.systems)}")
+        print("[MULTI-LANE SYSTEM] Ready. Press 'q' to exit.")
+
+        self.pipeline.start()
+        try:
+            while self.pipeline.is_running():
+                for lane, system in self.systems.items():
+                    frame = self.pipeline.latest_frame(lane)
+                    system._publish_preview(frame, system.last_preview)
+                    if frame is not None and not self.headless:
+                        cv2.imshow(lane, frame)
+
+                self.pipeline.report_if_due()
+
+                if self.headless:
+                    time.sleep(0.05)
+                elif cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+        except KeyboardInterrupt:
+            self.logger.log_info("Multi-lane system stopped by user")
+        finally:
+            self.pipeline.stop()
+            for system in self.systems.values():
+                system._cleanup()
+            self.db.close()  # Writes queued denial incidents
@@ -0,0 +1,68 @@
+# payment_system.py
+import queue
+import threading
+import time
+from modules.gate_control import GateController
+from modules.payment_processor import PaymentProcessor
+from modules.logger import ParkingLogger
+
+
+class PaymentSystem:
+    def __init__(self, port=None, payment_processor=None):
+        self.gate_controller = GateController(port=port)
+        self.payment_processor = payment_processor or PaymentProcessor()
+        self.logger = ParkingLogger()
+        self._stop = threading.Event()
+        # (arrival time, line) from the controller's serial reader thread
+        self.messages = queue.Queue()
+
+    def _on_message(self, line):
+        self.messages.put((time.monotonic(), line))
+
+    def _next_line(self, timeout):
+        """Next card reader line, blocking until one arrives or `timeout` passes"""
+        try:
+            return self.messages.get(timeout=timeout)[1]
+        except queue.Empty:
+            return None
+
+    def run(self):
+        """Main payment processing loop"""
+        # Lines arrive through the gate controller's reader; react to each as soon as it lands
+        self.gate_controller.subscribe(self._on_message)
+        try:
+            if not self.gate_controller.connected:
+                self.logger.log_info("Payment Arduino not connected yet, waiting for it")
+                while not self.gate_controller.connected:
+                    if self._stop.wait(0.5):
+                        return
+
+            self.logger.log_info("Payment system started")
+            print("[PAYMENT SYSTEM] Listening for payment requests...")
+
+            while not self._stop.is_set():
+                try:
+                    received_at, line = self.messages.get(timeout=1)
+                except queue.Empty:
+                    continue
+                print(f"[SERIAL] Received: {line}")
+
+                plate, balance = self.payment_processor.parse_arduino_data(line)
+                if plate and balance is not None:
+                    # Replies go through the controller, which serialises writes with its reconnects
+                    success = self.payment_processor.process_payment(
+                        plate, balance, self.gate_controller, self._next_line
+                    )
+                    self.logger.log_payment(plate, balance, success, time.monotonic() - received_at)
+
+        except KeyboardInterrupt:
+            self.logger.log_info("Payment system stopped by user")
+        except Exception as e:
+            self.logger.log_error(f"Payment system error: {e}")
+        finally:
+            self.gate_controller.unsubscribe(self._on_message)
+            self.gate_controller.close()
+
+    def stop(self):
+        """Leave the run loop after the current transaction"""
+        self._stop.set()
@@ -1,65 +1,75 @@
 # process_payment.py
-import sys
-import serial
-import time
-from car_entry import CarEntrySystem
-from car_exit import CarExitSystem
-from modules.gate_control import GateController
-from modules.payment_processor import PaymentProcessor
-from modules.logger import ParkingLogger
-
-
-class PaymentSystem:
-    def __init__(self):
-        self.gate_controller = GateController()
-        self.payment_processor = PaymentProcessor()
-        self.logger = ParkingLogger()
-
-    def run(self):
-        """Main payment processing loop"""
-        if not self.gate_controller.arduino:
-            self.logger.log_error("Arduino not connected for payment system")
-            return
+from modules.thread_limits import limit_threads_env, threads_from_argv
 
-        self.logger.log_info("Payment system started")
-        print("[PAYMENT SYSTEM] Listening for payment requests...")
+limit_threads_env(threads_from_argv())  # Before anything imports torch
 
-        try:
-            # Flush any previous data
-            self.gate_controller.arduino.reset_input_buffer()
-
-            while True:
-                if self.gate_controller.arduino.in_waiting:
-                    line = self.gate_controller.arduino.readline().decode().strip()
-                    print(f"[SERIAL] Received: {line}")
-
-                    plate, balance = self.payment_processor.parse_arduino_data(line)
-                    if plate and balance is not None:
-                        success = self.payment_processor.process_payment(
-                            plate, balance, self.gate_controller.arduino
-                        )
-                        self.logger.log_payment(plate, balance, success)
+import argparse
+from car_entry import CarEntrySystem
+from car_exit import CarExitSystem
+from multi_lane import MultiLaneSystem, parse_lane
+from payment_system import PaymentSystem
+from modules.database_utils import DatabaseManager, ARCHIVE_AFTER_DAYS
+from modules.model_backends import BACKENDS
+from modules.preview import PreviewPublisher, DEFAULT_PREVIEW_PORTS
 
-                time.sleep(0.1)  # Small delay to prevent CPU spinning
 
-        except KeyboardInterrupt:
-            self.logger.log_info("Payment system stopped by user")
-        except Exception as e:
-            self.logger.log_error(f"Payment system error: {e}")
-        finally:
-            self.gate_controller.close()
+parser = argparse.ArgumentParser(description="Parking management system")
+parser.add_argument('mode', help="entry, exit, payment, multi, archive or rebuild-stats")
+parser.add_argument('--backend', choices=BACKENDS, default='pytorch',
+                    help="Plate detector inference backend (exported once and cached)")
+parser.add_argument('--imgsz', type=int, default=640, help="Detector input size")
+parser.add_argument('--threads', type=int, default=None, help="CPU threads for inference")
+parser.add_argument('--detect-width', type=int, default=None,
+                    help="Detect on frames downscaled to this width, crop plates at full resolution")
+parser.add_argument('--headless', action='store_true',
+                    help="No preview windows; live previews are served to the dashboard instead")
+parser.add_argument('--preview-port', type=int, default=None,
+                    help="Local port for dashboard previews (default per mode when headless, 0 to disable)")
+parser.add_argument('--lane', action='append', default=[], type=parse_lane,
+                    help="Lane for multi mode as entry|exit:camera[:port]; repeat per lane")
+parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                    help="Archive mode: move paid sessions that exited more than this many days ago")
+args = parser.parse_args()
 
+mode = args.mode.lower()
+recognizer_options = {'backend': args.backend, 'imgsz': args.imgsz, 'threads': args.threads,
+                      'detect_width': args.detect_width}
 
-mode = sys.argv[1].lower()
+# Previews are served only when headless or when a port is given explicitly
+preview = None
+preview_port = args.preview_port
+if preview_port is None and args.headless:
+    preview_port = DEFAULT_PREVIEW_PORTS.get(mode)
+if mode in ('entry', 'exit', 'multi') and preview_port:
+    try:
+        preview = PreviewPublisher(preview_port).start()
+    except OSError as e:
+        print(f"[WARNING] Preview port {preview_port} unavailable ({e}); continuing without dashboard previews")
+view_options = {'headless': args.headless, 'preview': preview}
 
 if mode == 'entry':
-    system = CarEntrySystem()
+    system = CarEntrySystem(**view_options, **recognizer_options)
     system.run()
 elif mode == 'exit':
-    system = CarExitSystem()
+    system = CarExitSystem(**view_options, **recognizer_options)
+    system.run()
+elif mode == 'multi':
+    if not args.lane:
+        parser.error("multi mode needs at least one --lane")
+    system = MultiLaneSystem(args.lane, **view_options, **recognizer_options)
     system.run()
 elif mode == 'payment':
     system = PaymentSystem()
     system.run()
+elif mode == 'archive':
+    db = DatabaseManager()
+    moved = db.archive_closed_sessions(args.older_than_days)
+    print(f"[ARCHIVE] Moved {moved} paid sessions older than {args.older_than_days} days")
+    db.close()
+elif mode == 'rebuild-stats':
+    db = DatabaseManager()
+    db.rebuild_stats()
+    print("[STATS] Hourly and daily rollups rebuilt from all records")
+    db.close()
 else:
-    print("Invalid mode. Use: entry, exit, or payment")
\ No newline at end of file
+    print("Invalid mode. Use: entry, exit, payment, multi, archive or rebuild-stats")
\ No newline at end of file
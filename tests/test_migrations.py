@@ -0,0 +1,71 @@
+# tests/test_migrations.py
+import sqlite3
+
+from modules.database_utils import DatabaseManager, to_epoch
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE parking_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entry_time TEXT NOT NULL,
+        exit_time TEXT,
+        car_plate TEXT NOT NULL,
+        due_payment REAL DEFAULT 0,
+        payment_status INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE denial_incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plate TEXT NOT NULL,
+        denial_time TEXT NOT NULL,
+        reason TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+
+def legacy_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        'INSERT INTO parking_records (id, entry_time, exit_time, car_plate, due_payment, payment_status) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [
+            (1, '2024-03-01 08:00:00', '2024-03-01 09:30:00', 'RAB123C', 1000, 1),
+            (2, '01/03/2024 08:00', None, 'RAC456D', 0, 0),  # Malformed entry time
+            (3, '2024-03-01 10:00:00', 'yesterday', 'RAD789E', 500, 1),  # Malformed exit time
+            (4, '2024-03-01 11:00:00', None, 'RAE012F', 0, 0),
+        ]
+    )
+    conn.executemany(
+        'INSERT INTO denial_incidents (id, plate, denial_time, reason) VALUES (?, ?, ?, ?)',
+        [(1, 'RAC456D', '2024-03-01 08:05:00', 'Unpaid parking record'),
+         (2, 'RAC456D', '', 'Unpaid parking record')]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_malformed_legacy_times_are_set_aside(tmp_path, capsys):
+    path = str(tmp_path / 'records.db')
+    legacy_database(path)
+
+    db = DatabaseManager(path)
+    try:
+        with db.get_connection() as conn:
+            records = {row['id']: row for row in conn.execute('SELECT * FROM parking_records')}
+            rejected = [row['id'] for row in conn.execute('SELECT id FROM rejected_parking_records ORDER BY id')]
+            rejected_text = conn.execute('SELECT entry_time FROM rejected_parking_records WHERE id = 2').fetchone()[0]
+            denials = [row['id'] for row in conn.execute('SELECT id FROM denial_incidents')]
+            rejected_denials = [row['id'] for row in conn.execute('SELECT id FROM rejected_denial_incidents')]
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        db.close()
+
+    assert sorted(records) == [1, 4]
+    assert records[1]['entry_time'] == to_epoch('2024-03-01 08:00:00')
+    assert records[1]['exit_time'] == to_epoch('2024-03-01 09:30:00')
+    assert rejected == [2, 3]
+    assert rejected_text == '01/03/2024 08:00'
+    assert denials == [1] and rejected_denials == [2]
+    assert version >= 2
+    assert 'rejected_parking_records' in capsys.readouterr().out
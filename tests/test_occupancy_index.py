@@ -0,0 +1,78 @@
+# tests/test_occupancy_index.py
+import threading
+
+import pytest
+
+from modules.database_utils import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'records.db'))
+    yield db
+    db.close()
+
+
+class InterleavedConnection:
+    """Connection that runs `during_read` right after the first SELECT of a reload"""
+
+    def __init__(self, conn, during_read):
+        self.conn = conn
+        self.during_read = during_read
+
+    def execute(self, sql, *params):
+        cursor = self.conn.execute(sql, *params)
+        if sql.lstrip().upper().startswith('SELECT') and self.during_read:
+            during_read, self.during_read = self.during_read, None
+            during_read()
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def in_other_thread(call):
+    thread = threading.Thread(target=call)
+    thread.start()
+    thread.join()
+
+
+def test_reload_overlapping_a_commit_does_not_lose_it(db):
+    # Another thread commits an entry (and writes it through) while this
+    # thread's reload is reading a snapshot taken before that commit
+    with db.get_connection() as conn:
+        conn = InterleavedConnection(conn, lambda: in_other_thread(lambda: db.add_entry('RAB123C')))
+        assert db.occupancy.load(conn, 0)
+
+    assert db.occupancy.discarded_reloads == 1
+    assert db.occupancy.unpaid('RAB123C') is not None
+    assert db.occupancy.occupancy() == 1
+    assert not db.admit_entry('RAB123C', 300).allowed
+
+
+def test_write_throughs_only_touch_their_own_records(db):
+    db.add_entry('RAB123C')
+    db.update_exit_and_payment('RAB123C', 500)
+    records = [dict(db.get_unpaid_record('RAB123C'))]
+
+    # A new entry of the same plate lands before the payment's write-through
+    entry_id = db.add_entry('RAB123C')
+    db.occupancy.mark_paid('RAB123C', [records[0]['id']])
+
+    assert db.occupancy.unpaid('RAB123C')['id'] == entry_id
+    assert db.occupancy.occupancy() == 1
+
+
+def test_commits_from_another_connection_trigger_a_reload(tmp_path):
+    path = str(tmp_path / 'records.db')
+    lane, payment = DatabaseManager(path), DatabaseManager(path)
+    try:
+        assert lane.admit_entry('RAB123C').allowed
+        assert payment.has_unpaid_record('RAB123C')
+        payment.update_exit_and_payment('RAB123C', 500)
+        payment.mark_as_paid('RAB123C')
+        assert not lane.has_unpaid_record('RAB123C')
+        assert lane.get_daily_stats()['currently_parked'] == 0
+    finally:
+        lane.close()
+        payment.close()
@@ -0,0 +1,34 @@
+# tests/test_plate_decoder.py
+from modules.plate_decoder import PlateDecoder
+
+
+def decode(text, confidences=None):
+    return PlateDecoder().decode(text, confidences)[:2]
+
+
+def test_exact_plate():
+    assert decode('RAB123C') == ('RAB123C', 0)
+
+
+def test_confusable_characters_are_corrected():
+    assert decode('RA8I23C') == ('RAB123C', 2)
+
+
+def test_plate_found_after_leading_noise():
+    assert decode('|: RAB123C') == ('RAB123C', 0)
+
+
+def test_window_must_start_at_an_r():
+    # Grammar-shaped noise in the middle of a line with no R to anchor on
+    assert decode('XX 0AB123C') == (None, 0)
+    assert decode('TEXT AB1234C') == (None, 0)
+
+
+def test_prefix_may_not_be_entirely_corrected():
+    assert decode('K4B123C') == (None, 0)
+    assert decode('KAB123C') == ('RAB123C', 1)
+
+
+def test_prefix_corrections_share_the_budget():
+    assert decode('KAB1Z3C') == ('RAB123C', 2)
+    assert decode('KABIZ3C') == (None, 0)
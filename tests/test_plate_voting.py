@@ -0,0 +1,20 @@
+# tests/test_plate_voting.py
+from modules.plate_voting import PlateVoter
+
+
+def test_zero_weight_reads_do_not_decide():
+    voter = PlateVoter()
+    assert voter.add('RAB123C', 0.0, now=1.0) is None
+    assert voter.add('RAB123C', 0.0, now=2.0) is None
+    assert len(voter) == 2
+
+
+def test_zero_weight_reads_do_not_block_a_later_decision():
+    voter = PlateVoter()
+    voter.add('RAB123C', 0.0, now=1.0)
+    assert voter.add('RAB123C', 0.8, now=2.0) is None
+    assert voter.add('RAB123C', 0.8, now=3.0) == 'RAB123C'
+
+
+def test_single_confident_read_exits_early():
+    assert PlateVoter().add('RAB123C', 0.95, now=1.0) == 'RAB123C'